@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+'''
+Benchmark of the analysis stages on a synthetic repository.
+Creates a repository with lib/synthetic_repo.py, then runs the analysis
+on it and reports the time of the stages measured by its metrics: the
+history walk, the tree walk, the blob reading, the complexity analysis,
+the statistics of the commits and the report writing. The results are
+written as JSON, a previous result can be passed with --compare to see
+the changes.
+'''
+
+import argparse
+import json
+import os.path
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lib.analyzer import Analyzer, Config
+from lib.report_writers import REPORT_FORMATS
+from lib.synthetic_repo import create_synthetic_repo
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Stage:
+    '''Measures the time and, when tracemalloc is running, the peak of
+    the memory allocated in the with block. The number of the processed
+    items and bytes is set inside the block.
+    '''
+
+    def __init__(self, results, name):
+        self.results = results
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        print("{}...".format(self.name))
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        result = {"seconds": round(seconds, 6), "items": self.items}
+        if seconds > 0:
+            result["items_per_second"] = round(self.items / seconds, 1)
+        if self.bytes:
+            result["bytes"] = self.bytes
+            if seconds > 0:
+                result["bytes_per_second"] = round(self.bytes / seconds)
+        if tracemalloc.is_tracing():
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        self.results[self.name] = result
+
+
+def stage_results(metrics, commits):
+    '''Returns the results of the stages measured by the Metrics of the
+    analysis (see lib/metrics.py). With worker processes the time of
+    blob_read and analyze_complexity is the sum of all the workers.
+    '''
+    blobs = metrics["counters"].get("blobs", 0)
+    bytes_read = metrics["counters"].get("bytes_read", 0)
+    items = {
+        "history_walk": commits, "blob_read": blobs,
+        "analyze_complexity": blobs}
+    stages = {}
+    for name, seconds in metrics["stages"].items():
+        result = {"seconds": seconds}
+        if name in items:
+            result["items"] = items[name]
+            if seconds > 0:
+                result["items_per_second"] = round(items[name] / seconds, 1)
+        if name in ("blob_read", "analyze_complexity") and bytes_read:
+            result["bytes"] = bytes_read
+            if seconds > 0:
+                result["bytes_per_second"] = round(bytes_read / seconds)
+        stages[name] = result
+    return stages
+
+
+def run_benchmark(repo_path, report_file, report_format, vectorized,
+                  workers):
+    '''Runs the analysis of the repository with the Analyzer (see
+    lib/analyzer.py), returns a dictionary with the results of the whole
+    analysis and of every stage it measured
+    '''
+    config = Config(
+        repo_path, report_file, [], report_format=report_format,
+        vectorized=vectorized, workers=workers)
+    stages = {}
+    with Stage(stages, "analysis") as stage:
+        _, _, summary = Analyzer(config).run()
+        stage.items = summary["commits"]
+        stage.bytes = summary["metrics"]["counters"].get("bytes_read", 0)
+    stages.update(stage_results(summary["metrics"], summary["commits"]))
+    return stages
+
+
+def analyzer_version():
+    '''Returns the git version of the analyzer or None outside of git'''
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(previous, results):
+    print("{:<20}{:>12}{:>12}{:>9}".format(
+        "stage", "before", "after", "ratio"))
+    for name, stage in results["stages"].items():
+        before = previous["stages"].get(name, {}).get("seconds")
+        if before is None:
+            continue
+        ratio = stage["seconds"] / before if before else float('inf')
+        print("{:<20}{:>12.3f}{:>12.3f}{:>9.2f}".format(
+            name, before, stage["seconds"], ratio))
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--commits', type=int, default=500)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--file-lines', type=int, default=200)
+    parser.add_argument('--changes-per-commit', type=int, default=5)
+    parser.add_argument('--rename-rate', type=float, default=0.05)
+    parser.add_argument('--delete-rate', type=float, default=0.02)
+    parser.add_argument(
+        '--merge-every', type=int, default=0,
+        help="make every n-th commit a merge of a side branch")
+    parser.add_argument('--branch-length', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--repo', help="benchmark an existing repository instead of "
+        "creating a synthetic one")
+    parser.add_argument(
+        '--report-format', choices=REPORT_FORMATS, default='xlsx')
+    parser.add_argument('--vectorized', action='store_true')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument(
+        '--trace-memory', action='store_true',
+        help="measure the peak memory of the generation and of the "
+        "analysis with tracemalloc, this slows them down")
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument(
+        '--compare', help="JSON result of a previous run to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    parameters = {
+        "commits": arguments.commits, "files": arguments.files,
+        "file_lines": arguments.file_lines,
+        "changes_per_commit": arguments.changes_per_commit,
+        "rename_rate": arguments.rename_rate,
+        "delete_rate": arguments.delete_rate,
+        "merge_every": arguments.merge_every,
+        "branch_length": arguments.branch_length, "seed": arguments.seed}
+    if arguments.trace_memory:
+        tracemalloc.start()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stages = {}
+        repo_path = arguments.repo
+        if not repo_path:
+            repo_path = os.path.join(tmp_dir, 'repo')
+            with Stage(stages, "generate") as stage:
+                create_synthetic_repo(repo_path, **parameters)
+                stage.items = arguments.commits
+        stages.update(run_benchmark(
+            repo_path, os.path.join(tmp_dir, 'report.xlsx'),
+            arguments.report_format, arguments.vectorized,
+            arguments.workers))
+    results = {
+        "version": analyzer_version(),
+        "python": platform.python_version(),
+        "repo": arguments.repo,
+        "parameters": None if arguments.repo else parameters,
+        "report_format": arguments.report_format,
+        "vectorized": arguments.vectorized,
+        "workers": arguments.workers,
+        "stages": stages,
+        "total_seconds": stages["analysis"]["seconds"]}
+    if resource is not None:
+        results["max_rss_kb"] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+    with open(arguments.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+    print("The results are written to {}".format(arguments.output))
+    if arguments.compare:
+        with open(arguments.compare) as previous_file:
+            print_comparison(json.load(previous_file), results)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
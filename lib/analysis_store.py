@@ -0,0 +1,79 @@
+'''
+Persistent storage of the analysis results between runs
+'''
+
+import json
+import sqlite3
+
+
+class AnalysisStore:
+    '''SQLite database keeping the complexity of the analyzed blobs and
+    the results calculated for every commit.
+    Everything is stored as JSON, the keys already contain the settings
+    fingerprint, so the results of the runs with different settings
+    do not mix up.
+    '''
+
+    commit_every = 1000
+
+    def __init__(self, file_name):
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS commits ("
+            "hexsha TEXT NOT NULL, kind TEXT NOT NULL, "
+            "fingerprint TEXT NOT NULL, result TEXT NOT NULL, "
+            "PRIMARY KEY (hexsha, kind, fingerprint))")
+        self.pending = 0
+
+    def get_blob(self, key):
+        '''Returns the stored result for the blob key or None'''
+        row = self.connection.execute(
+            "SELECT result FROM blobs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_blob(self, key, result):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO blobs (key, result) VALUES (?, ?)",
+            (key, json.dumps(result)))
+        self._written()
+
+    def get_commit(self, hexsha, kind, fingerprint):
+        '''Returns the stored result of the given kind for the commit
+        or None when the commit was not analyzed yet
+        '''
+        row = self.connection.execute(
+            "SELECT result FROM commits "
+            "WHERE hexsha = ? AND kind = ? AND fingerprint = ?",
+            (hexsha, kind, fingerprint)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_commit(self, hexsha, kind, fingerprint, result):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO commits "
+            "(hexsha, kind, fingerprint, result) VALUES (?, ?, ?, ?)",
+            (hexsha, kind, fingerprint, json.dumps(result)))
+        self._written()
+
+    def lookup_commit(self, hexsha, kind, fingerprint, compute):
+        '''Returns the stored result for the commit.
+        When there is nothing stored yet calls compute() and saves
+        what it returns.
+        '''
+        result = self.get_commit(hexsha, kind, fingerprint)
+        if result is None:
+            result = compute()
+            self.put_commit(hexsha, kind, fingerprint, result)
+        return result
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.connection.commit()
+            self.pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,528 @@
+'''
+Analysis of one repository without any global state. The settings are
+kept in a Config (see lib/config.py) and the state of a run in an
+Analyzer, so several repositories can be analyzed in one process, sharing
+one ComplexityCache.
+'''
+
+import datetime
+
+from git import Blob, Commit, Repo, Submodule
+from git.exc import GitCommandError, InvalidGitRepositoryError
+
+from lib.analysis_store import AnalysisStore
+from lib.blob_engine import BlobEngine, analyze_blob_jobs
+from lib.blob_guard import SNIFF_SIZE, skipped_result
+from lib.blob_reader import (
+    CatFileReader, ObjectSizeReader, read_blob_prefix)
+from lib.complexity_cache import ComplexityCache, settings_fingerprint
+from lib.config import AnalysisError, Config
+from lib.file_names import IgnoreMatcher, PathMatcher
+from lib.git_log import iter_log
+from lib.indent_stats import (
+    join_histogram, process_indent_stats, subtract_histogram)
+from lib.languages import language_for_path
+from lib.metrics import Metrics
+from lib.records import BlobComplexity, CommitTable, FileRevision, FileStats
+from lib.report_writers import create_report
+from lib.results_index import ResultsIndex
+from lib.sampling import sample_commits
+from lib.tree_summary import TreeSummary, TreeSummaryCache, tree_entries
+from lib.xlsx_report import complexity_value
+
+
+TREE_TYPE = 0o04
+BLOB_TYPES = (0o10, 0o12)
+
+
+def collect_commit_complexity(tree_summary):
+    return process_indent_stats(tree_summary.hist)
+
+
+class Analyzer:
+    '''Analyzes the history of one repository.
+    complexity_cache may be shared by several analyzers of repositories
+    with common objects, for example forks, the same blob is then analyzed
+    only once. A shared cache keeps the results in memory only, the store
+    of the config is used for the commit statistics then.
+    progress is called with the number of the processed commits and
+    the number of all the commits. With verbose set the steps of the
+    analysis are printed.
+    '''
+
+    def __init__(self, config, complexity_cache=None, progress=None,
+                 verbose=False):
+        self.config = config
+        self.progress = progress
+        self.verbose = verbose
+        self.guard = config.blob_guard()
+        self.fingerprint = settings_fingerprint(
+            config.ignored_files, config.ignore_one_char_lines, self.guard,
+            config.paths)
+        self.ignore_matcher = IgnoreMatcher(config.ignored_files)
+        self.path_matcher = PathMatcher(config.paths)
+        self.metrics = Metrics(config.metrics_log)
+        self.store = None
+        self.index = None
+        self.complexity_cache = complexity_cache
+        self.repo = None
+        self.engine = None
+        self.reader = None
+        self.size_reader = None
+        self.tree_summaries = TreeSummaryCache(config.tree_cache_size)
+        self.commit_count = 0
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def open_repo(self):
+        '''Opens the repository and counts the commits to analyze'''
+        config = self.config
+        try:
+            self.repo = Repo(config.path)
+            self.commit_count = int(self.repo.git.rev_list(
+                config.rev_range, '--', *config.paths, count=True,
+                **self.config.rev_list_options()))
+        except (InvalidGitRepositoryError, OSError) as e:
+            raise AnalysisError("Invalid git repository {}".format(str(e)))
+        except GitCommandError as e:
+            raise AnalysisError("Cannot list the commits of {}: {}".format(
+                config.rev_range, e.stderr.strip()))
+        self.log("Repository imported, the number of commits is {}".format(
+            self.commit_count))
+        return self.repo
+
+    def lookup_commit(self, commit, kind, compute):
+        '''Returns the result of compute() for the commit, taking it from
+        the store when the commit was analyzed in one of the previous runs
+        '''
+        if self.store:
+            return self.store.lookup_commit(
+                str(commit), kind, self.fingerprint, compute)
+        return compute()
+
+    def collect_file_changes(self, log_commit):
+        '''Returns the list of the files changed in the commit as tuples
+        (old name, new name, churn stats, Blob of the new revision). The old
+        name is None for an added file and the new name is None for a
+        deleted one, the Blob is None when the new revision is not
+        analyzed. A file renamed from or to an ignored path is handled as
+        added or deleted.
+        '''
+        changes = []
+        for change in log_commit.changes:
+            old_name = change.old_path
+            new_name = change.new_path
+            if old_name and self.ignore_matcher(old_name):
+                old_name = None
+            if new_name and self.ignore_matcher(new_name):
+                new_name = None
+            if not old_name and not new_name:
+                continue
+            blob = None
+            mode = int(change.new_mode, 8)
+            if new_name and mode != Submodule.k_default_mode:
+                blob = Blob(
+                    self.repo, bytes.fromhex(change.new_hexsha), mode,
+                    new_name)
+            changes.append((
+                old_name, new_name,
+                [change.insertions + change.deletions, change.insertions,
+                 change.deletions], blob))
+        return changes
+
+    def update_file_stats(self, files, commit_index, changes):
+        '''Adds the changes of a commit to the statistics per file. The
+        history goes from the oldest commit, so a renamed file takes over
+        the statistics of its old name and only the latest revisions are
+        kept. The complexity of the revisions is not evaluated here, see
+        resolve_file_revisions, so the revisions pushed out by the newer
+        ones are never analyzed.
+        '''
+        for old_name, new_name, (lines, insertions, deletions), blob in (
+                changes):
+            file_stats = files.pop(old_name or new_name, None)
+            if file_stats is None:
+                file_stats = FileStats(
+                    new_name or old_name, self.config.file_revisions)
+            if new_name:
+                file_stats.name = new_name
+            files[file_stats.name] = file_stats
+            file_stats.commits += 1
+            file_stats.lines += lines
+            file_stats.insertions += insertions
+            file_stats.deletions += deletions
+            file_stats.deleted = new_name is None
+            if blob:
+                file_stats.revisions.appendleft(
+                    FileRevision(commit_index, None, blob))
+
+    def resolve_file_revisions(self, files):
+        '''Evaluates the complexity of the revisions kept for the files,
+        all the blobs are analyzed in one batch
+        '''
+        pending = [revision for file_stats in files.values()
+                   for revision in file_stats.revisions
+                   if revision.complexity is None]
+        for revision, (_, complexity) in zip(pending, self.analyze_blobs(
+                [revision.blob for revision in pending])):
+            revision.complexity = complexity
+            revision.blob = None
+
+    def analyze_blobs(self, blobs):
+        '''Returns the list of tuples (cache key, complexity) for the blobs.
+        The blobs that are not in the cache yet are read and analyzed in
+        one batch, by the worker processes when they are enabled.
+        '''
+        complexity_cache = self.complexity_cache
+        languages = [language_for_path(blob.path) for blob in blobs]
+        keys = [complexity_cache.key(blob.hexsha, language)
+                for blob, language in zip(blobs, languages)]
+        missing = {}
+        for key, blob, language in zip(keys, blobs, languages):
+            if key not in missing and complexity_cache.get(key) is None:
+                missing[key] = (blob, language)
+        sizes = None
+        if self.size_reader and missing:
+            missing, sizes = self.skip_large_blobs(missing)
+        jobs = [(blob.hexsha, language)
+                for blob, language in missing.values()]
+        timings = []
+        if self.engine:
+            results = self.engine.analyze(jobs, timings, sizes)
+        else:
+            results = analyze_blob_jobs(
+                self.reader, jobs, self.config.ignore_one_char_lines,
+                self.config.vectorized, timings, self.guard)
+        for key, result in zip(missing, results):
+            complexity_cache.put(key, result)
+        for (blob, _), (size, read_seconds, analyze_seconds) in zip(
+                missing.values(), timings):
+            self.metrics.add_blob(
+                blob.path, size, read_seconds, analyze_seconds)
+        return [(key, complexity_cache.results[key]) for key in keys]
+
+    def skip_large_blobs(self, missing):
+        '''Reads the sizes of the blobs to analyze from their headers and
+        saves an empty result for the ones bigger than max_blob_size, they
+        are not read at all. Of the blobs bigger than large_blob_size only
+        the first bytes are read at first, so a binary one is skipped
+        without reading it whole. Returns the rest of the blobs and the
+        list of their sizes.
+        '''
+        guard = self.guard
+        result = {}
+        sizes = []
+        for (key, value), size in zip(missing.items(), self.size_reader.sizes(
+                [blob.hexsha for blob, _ in missing.values()])):
+            if guard.skip_size(size or 0) or (
+                    guard.skip_binary and guard.is_large(size or 0) and
+                    guard.is_binary(read_blob_prefix(
+                        self.config.path, value[0].hexsha, SNIFF_SIZE,
+                        guard.large_size))):
+                self.complexity_cache.put(key, skipped_result())
+                self.metrics.count("skipped_blobs")
+            else:
+                result[key] = value
+                sizes.append(size or 0)
+        return result, sizes
+
+    def collect_complexity_stats_from_file_tree(self, tree):
+        '''Returns the TreeSummary of the analyzed files in the tree.
+        The summaries are memoized by the SHA of the tree, so only the
+        directories changed since the previous commits are walked again.
+        With paths set only the files within them are analyzed.
+        The tree is walked without recursion from the top, reading the
+        raw tree entries instead of making an object for every one of
+        them. The blobs of all the new directories are analyzed in one
+        batch and then their summaries are built from the bottom.
+        '''
+        summaries = self.tree_summaries
+        summary = summaries.get(tree.binsha, tree.path)
+        if summary is not None:
+            return summary
+        odb = self.repo.odb
+        pending = []
+        blobs = []
+        stack = [(tree.binsha, tree.path)]
+        with self.metrics.stage("tree_walk"):
+            while stack:
+                binsha, path = stack.pop()
+                prefix = path + '/' if path else ''
+                children = []
+                for sha, mode, name in tree_entries(
+                        odb.stream(binsha).read()):
+                    item_path = prefix + name
+                    item_type = mode >> 12
+                    if item_type == TREE_TYPE:
+                        if (self.ignore_matcher.ignore_directory(item_path) or
+                                not self.path_matcher.visit_directory(
+                                    item_path)):
+                            continue
+                        summary = summaries.get(sha, item_path)
+                        children.append((name, item_path, summary))
+                        if summary is None:
+                            stack.append((sha, item_path))
+                    elif item_type in BLOB_TYPES:
+                        if (self.ignore_matcher(item_path) or
+                                not self.path_matcher(item_path)):
+                            continue
+                        children.append((name, item_path, None))
+                        blobs.append(Blob(self.repo, sha, mode, item_path))
+                    else:
+                        self.log("Dont know how to work with mode {:o}"
+                                 .format(mode))
+                pending.append((binsha, path, children))
+        complexity = {
+            blob.path: blob_complexity
+            for blob, (_, blob_complexity) in zip(
+                blobs, self.analyze_blobs(blobs))}
+        built = {}
+        with self.metrics.stage("tree_walk"):
+            for binsha, path, children in reversed(pending):
+                hist = []
+                file_count = 0
+                entries = {}
+                for name, item_path, summary in children:
+                    entry = complexity.get(item_path)
+                    if entry is not None:
+                        file_count += 1
+                    else:
+                        entry = summary or built.pop(item_path)
+                        file_count += entry.file_count
+                    hist = join_histogram(hist, entry.hist)
+                    entries[name] = entry
+                summary = TreeSummary(hist, file_count, entries)
+                summaries.put(binsha, path, summary)
+                built[path] = summary
+        return summary
+
+    def analyzed_blob(self, blob):
+        '''Tells if a blob from a diff is a part of the analysis'''
+        return (blob is not None and
+                blob.mode != Submodule.k_default_mode and
+                not self.ignore_matcher(blob.path) and
+                self.path_matcher(blob.path))
+
+    def collect_commit_complexity_incremental(self, commit, previous):
+        '''Calculates the complexity of the commit from the histogram of
+        the previously analyzed commit and the diff between the two
+        commits. previous is a tuple (commit, histogram). The cost depends
+        on the size of the diff rather than on the size of the tree.
+        '''
+        previous_commit, indent_hist = previous
+        diffs = previous_commit.diff(commit)
+        removed = [diff.a_blob for diff in diffs
+                   if self.analyzed_blob(diff.a_blob)]
+        added = [diff.b_blob for diff in diffs
+                 if self.analyzed_blob(diff.b_blob)]
+        for _, complexity in self.analyze_blobs(removed):
+            indent_hist = subtract_histogram(indent_hist, complexity.hist)
+        for _, complexity in self.analyze_blobs(added):
+            indent_hist = join_histogram(indent_hist, complexity.hist)
+        return process_indent_stats(indent_hist)
+
+    def first_parent_commits(self):
+        '''Returns the list of tuples (hexsha, commit timestamp) of the
+        first parent line starting from the latest commit
+        '''
+        options = dict(
+            self.config.rev_list_options(), first_parent=True, timestamp=True)
+        commits = []
+        for line in self.repo.git.rev_list(
+                self.config.rev_range, '--', *self.config.paths,
+                **options).splitlines():
+            timestamp, hexsha = line.split()
+            commits.append((hexsha, int(timestamp)))
+        return commits
+
+    def collect_stats(self, report):
+        '''Walks the history once from the oldest commit and collects both
+        the statistics per file and the complexity statistics for each
+        revision. The changed files of all the commits are read from one
+        git log.
+        The statistics of every revision are passed to the report right
+        away, the statistics per file, the CommitTable their revisions
+        refer to and the statistics of the latest analyzed commit are
+        returned at the end.
+        Every commit tree is analyzed at most once and only when the
+        results for the commit are not in the store yet.
+        With the sampling granularity set, only the selected commits get
+        the complexity statistics, the other ones contribute to the
+        statistics per file only.
+        The complexity of the files is evaluated at the end and only for
+        the latest file_revisions revisions of every file.
+        '''
+        config = self.config
+        metrics = self.metrics
+        repo = self.repo
+        self.log("Collecting file and complexity statistics...")
+        files = {}
+        commits = CommitTable()
+        sample = None
+        if config.granularity != 'all':
+            sample = sample_commits(
+                self.first_parent_commits(), config.granularity,
+                config.every_n)
+        commit_no = 1
+        previous = None
+        stats = None
+        log = iter_log(
+            repo, config.rev_range, config.paths, **config.rev_list_options())
+        for log_commit in metrics.timed("history_walk", log):
+            if self.progress:
+                self.progress(commit_no, self.commit_count)
+            metrics.progress(
+                commit_no, self.complexity_cache.hits,
+                self.complexity_cache.misses)
+            commit_no += 1
+            commit_index = commits.add(log_commit.hexsha)
+            with metrics.stage("file_changes"):
+                self.update_file_stats(
+                    files, commit_index,
+                    self.collect_file_changes(log_commit))
+            date = datetime.datetime.fromtimestamp(
+                log_commit.timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            if self.index:
+                self.index.add_walked_commit(
+                    commit_index, log_commit.hexsha, date)
+            if sample is not None and log_commit.hexsha not in sample:
+                continue
+            commit = Commit(repo, bytes.fromhex(log_commit.hexsha))
+            with metrics.stage("commit_complexity"):
+                if config.incremental and previous:
+                    stats = self.lookup_commit(
+                        commit, "stats",
+                        lambda: self.collect_commit_complexity_incremental(
+                            commit, previous))
+                else:
+                    stats = self.lookup_commit(
+                        commit, "stats",
+                        lambda: collect_commit_complexity(
+                            self.collect_complexity_stats_from_file_tree(
+                                commit.tree)))
+            previous = (commit, stats["hist"])
+            with metrics.stage("report_write"):
+                report.add_commit({
+                    "commit": log_commit.hexsha, "stats": stats,
+                    "date": date})
+            if self.index:
+                # The summary of the tree is memoized, it is usually
+                # already in the cache from the analysis of the commit
+                with metrics.stage("results_index"):
+                    self.index.add_commit(
+                        commit_index, log_commit.hexsha, date, stats,
+                        self.collect_complexity_stats_from_file_tree(
+                            commit.tree))
+        with metrics.stage("file_revisions"):
+            self.resolve_file_revisions(files)
+        self.log("\bDone")
+        return files, commits, stats
+
+    def run(self):
+        '''Analyzes the repository and writes the report.
+        Returns the statistics per file, the CommitTable and the summary
+        of the run, see summary.
+        Raises AnalysisError when the analysis cannot be done.
+        '''
+        config = self.config
+        if config.store:
+            self.store = AnalysisStore(config.store)
+        if self.complexity_cache is None:
+            self.complexity_cache = ComplexityCache(
+                config.ignored_files, config.ignore_one_char_lines,
+                self.store, BlobComplexity, self.guard)
+        try:
+            try:
+                self.open_repo()
+                report = self.open_report()
+                if config.results_index:
+                    self.index = ResultsIndex(config.results_index)
+                if config.workers > 1:
+                    self.engine = BlobEngine(
+                        config.path, config.workers,
+                        config.ignore_one_char_lines, config.vectorized,
+                        self.guard)
+                else:
+                    self.reader = CatFileReader(config.path)
+                if (config.max_blob_size is not None or
+                        config.large_blob_size is not None):
+                    self.size_reader = ObjectSizeReader(config.path)
+                files, commits, stats = self.collect_stats(report)
+            finally:
+                self.close()
+            self.log('Writing the report...')
+            with self.metrics.stage("report_write"):
+                report.write_files(files, commits)
+                report.close()
+            if self.index:
+                with self.metrics.stage("results_index"):
+                    self.index.write_files(files, commits)
+                    self.index.close()
+                    self.index = None
+            return files, commits, self.summary(files, commits, stats)
+        finally:
+            self.metrics.close(
+                self.complexity_cache.hits, self.complexity_cache.misses)
+
+    def open_report(self):
+        config = self.config
+        try:
+            return create_report(
+                config.report_format, config.report,
+                config.show_deleted_files, config.streaming_report)
+        except ValueError as e:
+            raise AnalysisError(str(e))
+        except OSError:
+            raise AnalysisError(
+                "The file {} cannot be removed. Already in use?".format(
+                    config.report))
+
+    def summary(self, files, commits, stats):
+        '''Returns a dictionary with the numbers of the commits and the
+        files and the statistics of the latest analyzed commit
+        '''
+        summary = {
+            "path": self.config.path,
+            "report": self.config.report,
+            "results_index": self.config.results_index,
+            "commits": len(commits),
+            "files": sum(1 for file in files.values() if not file.deleted),
+            "lines_code": None, "avg": None, "stddev": None, "max": None,
+            "complexity": None}
+        if stats:
+            summary.update(
+                lines_code=stats["cnt"], avg=stats["avg"],
+                stddev=stats["stddev"], max=stats["max"],
+                complexity=complexity_value(stats))
+        summary["metrics"] = self.metrics.summary(
+            self.complexity_cache.hits, self.complexity_cache.misses)
+        return summary
+
+    def close(self):
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+        if self.size_reader:
+            self.size_reader.close()
+            self.size_reader = None
+        if self.store:
+            self.store.close()
+            self.store = None
+        if self.repo:
+            self.repo.close()
+            self.repo = None
+
+
+def analyze_repository(config, complexity_cache=None, progress=None,
+                       verbose=False):
+    '''Analyzes the repository with the Config and writes its report.
+    Returns the summary of the analysis, see Analyzer.summary.
+    '''
+    _, _, summary = Analyzer(
+        config, complexity_cache, progress, verbose).run()
+    return summary
@@ -0,0 +1,141 @@
+'''
+Analysis of many blobs, in the current process or in parallel workers
+'''
+
+from multiprocessing import Pool
+import time
+
+from lib.blob_guard import skipped_result
+from lib.blob_reader import CatFileReader
+from lib.complexity import (
+    analyze_complexity_data, analyze_complexity_data_vectorized)
+
+
+def analyze_blob_jobs(
+        reader, jobs, ignore_one_char_lines=True, vectorized=False,
+        timings=None, guard=None):
+    '''Reads the blobs with the reader and analyzes their complexity.
+    jobs is a list of tuples (blob hexsha, language of the file), see
+    analyze_complexity_data for the language.
+    With vectorized set to True analyze_complexity_data_vectorized is
+    used, the results are the same.
+    Returns the list of the results of analyze_complexity_data
+    in the same order as the jobs.
+    When timings is a list, a tuple (size, read seconds, analysis seconds)
+    is appended to it for every job.
+    With a BlobGuard the binary blobs are skipped and only a sample of
+    the big ones is analyzed, see lib/blob_guard.py.
+    '''
+    analyze_data = (analyze_complexity_data_vectorized if vectorized
+                    else analyze_complexity_data)
+
+    def analyze(data, language, ignore_one_char_lines):
+        if guard is not None:
+            data = guard.prepare(data)
+            if data is None:
+                return skipped_result()
+        return analyze_data(data, language, ignore_one_char_lines)
+
+    results = []
+    blobs = reader.read_many([hexsha for hexsha, _ in jobs])
+    if timings is None:
+        for (_, _, data), (_, language) in zip(blobs, jobs):
+            results.append(analyze(data, language, ignore_one_char_lines))
+        return results
+    for _, language in jobs:
+        start = time.perf_counter()
+        _, _, data = next(blobs)
+        read = time.perf_counter()
+        results.append(analyze(data, language, ignore_one_char_lines))
+        timings.append((
+            len(data), read - start, time.perf_counter() - read))
+    return results
+
+
+_reader = None
+_ignore_one_char_lines = True
+_vectorized = False
+_guard = None
+
+
+def _init_worker(path, ignore_one_char_lines, vectorized, guard):
+    global _reader
+    global _ignore_one_char_lines
+    global _vectorized
+    global _guard
+    _reader = CatFileReader(path)
+    _ignore_one_char_lines = ignore_one_char_lines
+    _vectorized = vectorized
+    _guard = guard
+
+
+def _analyze_batch(jobs):
+    timings = []
+    results = analyze_blob_jobs(
+        _reader, jobs, _ignore_one_char_lines, _vectorized, timings, _guard)
+    return results, timings
+
+
+class BlobEngine:
+    '''Pool of worker processes analyzing the complexity of blobs.
+    Every worker reads the blobs from the repository itself with its own
+    CatFileReader, so only the SHAs are sent to the workers and only the
+    results are sent back.
+    With a BlobGuard with large_size set, the large blobs are analyzed by
+    a separate smaller pool, so they do not hold up the small ones.
+    '''
+
+    def __init__(
+            self, path, workers, ignore_one_char_lines=True,
+            vectorized=False, guard=None):
+        self.workers = workers
+        self.guard = guard
+        initargs = (path, ignore_one_char_lines, vectorized, guard)
+        self.pool = Pool(workers, initializer=_init_worker, initargs=initargs)
+        self.large_pool = None
+        if guard is not None and guard.large_size is not None:
+            self.large_pool = Pool(
+                max(1, workers // 4), initializer=_init_worker,
+                initargs=initargs)
+
+    def analyze(self, jobs, timings=None, sizes=None):
+        '''Analyzes a batch of blobs, see analyze_blob_jobs.
+        The jobs are split into chunks, the results are merged back
+        in the same order as the jobs, and so are the timings measured
+        by the workers. sizes is the list of the sizes of the blobs, the
+        large ones are sent to the separate pool one by one.
+        '''
+        if not jobs:
+            return []
+        small = list(range(len(jobs)))
+        large = []
+        if sizes is not None and self.large_pool is not None:
+            small = [index for index, size in enumerate(sizes)
+                     if not self.guard.is_large(size)]
+            large = [index for index, size in enumerate(sizes)
+                     if self.guard.is_large(size)]
+        chunk_size = max(1, len(small) // (self.workers * 4))
+        batches = [(small[start:start + chunk_size], self.pool)
+                   for start in range(0, len(small), chunk_size)]
+        batches += [([index], self.large_pool) for index in large]
+        pending = [
+            (chunk, pool.apply_async(
+                _analyze_batch, ([jobs[index] for index in chunk],)))
+            for chunk, pool in batches]
+        results = [None] * len(jobs)
+        job_timings = [None] * len(jobs)
+        for chunk, result in pending:
+            chunk_results, chunk_timings = result.get()
+            for index, chunk_result, chunk_timing in zip(
+                    chunk, chunk_results, chunk_timings):
+                results[index] = chunk_result
+                job_timings[index] = chunk_timing
+        if timings is not None:
+            timings.extend(job_timings)
+        return results
+
+    def close(self):
+        for pool in (self.pool, self.large_pool):
+            if pool is not None:
+                pool.close()
+                pool.join()
@@ -0,0 +1,89 @@
+'''
+Classification of the blobs before the complexity analysis, so binary
+files and huge generated files do not stall the run
+'''
+
+from collections import Counter
+import math
+
+from lib.indent_stats import process_indent_stats
+
+
+# The number of the first bytes checked, git checks the same number of
+# bytes for the NUL byte to tell if a file is binary
+SNIFF_SIZE = 8000
+# The content with more bits of information per byte is compressed or
+# encrypted, the source code has around 4.5-5.5
+MAX_ENTROPY = 7.0
+# The files with longer lines on average are minified or generated
+MINIFIED_LINE_LENGTH = 1000
+
+
+def entropy(data):
+    '''Returns the Shannon entropy of the bytes in bits per byte'''
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total)
+                for count in Counter(data).values())
+
+
+def skipped_result():
+    '''Returns the result of analyze_complexity_data for a skipped blob,
+    it has no lines
+    '''
+    return {"lines total": 0, "lines code": 0,
+            "stats": process_indent_stats([])}
+
+
+class BlobGuard:
+    '''Decides how a blob is analyzed.
+    By the size from the object header, before the blob is read: the blobs
+    bigger than max_size are skipped, the ones bigger than large_size are
+    analyzed separately from the small ones, see BlobEngine. By the
+    content: the binary blobs (with a NUL byte or a high entropy in the
+    first SNIFF_SIZE bytes) and the minified ones are skipped when
+    skip_binary is set, only the first sample_size bytes of a bigger blob
+    are analyzed. None switches a limit off.
+    '''
+    __slots__ = ('max_size', 'sample_size', 'large_size', 'skip_binary')
+
+    def __init__(self, max_size=None, sample_size=None, large_size=None,
+                 skip_binary=True):
+        self.max_size = max_size
+        self.sample_size = sample_size
+        self.large_size = large_size
+        self.skip_binary = skip_binary
+
+    def settings(self):
+        '''Returns the settings changing the results of the analysis'''
+        return [self.max_size, self.sample_size, self.skip_binary]
+
+    def skip_size(self, size):
+        return self.max_size is not None and size > self.max_size
+
+    def is_large(self, size):
+        return self.large_size is not None and size > self.large_size
+
+    def is_binary(self, data):
+        '''Tells if the content is binary or minified by its first bytes'''
+        prefix = bytes(data[:SNIFF_SIZE])
+        if b'\0' in prefix:
+            return True
+        if len(prefix) == SNIFF_SIZE and (
+                prefix.count(b'\n') < SNIFF_SIZE // MINIFIED_LINE_LENGTH):
+            return True
+        # ASCII text cannot have more than 7 bits per byte
+        return (len(prefix) >= 1024 and not prefix.isascii() and
+                entropy(prefix) > MAX_ENTROPY)
+
+    def prepare(self, data):
+        '''Returns the part of the data to analyze or None when the blob
+        is skipped. A sample ends with the last whole line in it.
+        '''
+        if self.skip_binary and self.is_binary(data):
+            return None
+        if self.sample_size is not None and len(data) > self.sample_size:
+            end = bytes(data[:self.sample_size]).rfind(b'\n')
+            data = data[:end + 1 if end >= 0 else self.sample_size]
+        return data
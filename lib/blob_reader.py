@@ -0,0 +1,123 @@
+'''
+Reading of git objects through one long-living git cat-file process
+'''
+
+import subprocess
+
+
+class CatFileReader:
+    '''Reads objects from a repository using `git cat-file --batch`.
+    The process is started once and receives the requests in chunks,
+    the object data is read into one buffer that is reused for all
+    the objects.
+    '''
+
+    # Every request is 41 bytes, the chunk must fit into the pipe buffer,
+    # otherwise git could block writing the answers while we are still
+    # writing the requests
+    chunk_size = 256
+
+    def __init__(self, path):
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'], cwd=path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.buffer = bytearray(1 << 16)
+        self.bytes_read = 0
+
+    def read_many(self, hexshas):
+        '''Reads the objects one after another.
+        Yields tuples (hexsha, object type, data) where data is a
+        memoryview that is valid only until the next object is read.
+        A missing object is returned with the type "missing" and no data.
+        '''
+        for start in range(0, len(hexshas), self.chunk_size):
+            chunk = hexshas[start:start + self.chunk_size]
+            self.process.stdin.write(
+                ''.join(hexsha + '\n' for hexsha in chunk).encode('ascii'))
+            self.process.stdin.flush()
+            for hexsha in chunk:
+                yield self._read_object(hexsha)
+
+    def read(self, hexsha):
+        '''Returns the data of one object as bytes'''
+        for _, object_type, data in self.read_many([hexsha]):
+            if object_type == 'missing':
+                raise KeyError(hexsha)
+            return bytes(data)
+
+    def _read_object(self, hexsha):
+        stdout = self.process.stdout
+        header = stdout.readline().decode('ascii').split()
+        if len(header) < 3:
+            return hexsha, 'missing', None
+        object_type, size = header[1], int(header[2])
+        if size > len(self.buffer):
+            self.buffer = bytearray(size)
+        view = memoryview(self.buffer)[:size]
+        received = 0
+        while received < size:
+            count = stdout.readinto(view[received:])
+            if not count:
+                raise EOFError("git cat-file exited unexpectedly")
+            received += count
+        stdout.read(1)
+        self.bytes_read += size
+        return hexsha, object_type, view
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+class ObjectSizeReader:
+    '''Reads the sizes of objects from their headers using
+    `git cat-file --batch-check`, without reading the objects
+    '''
+
+    chunk_size = CatFileReader.chunk_size
+
+    def __init__(self, path):
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch-check=%(objectsize)'], cwd=path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def sizes(self, hexshas):
+        '''Returns the list of the sizes of the objects, None for a missing
+        object
+        '''
+        sizes = []
+        for start in range(0, len(hexshas), self.chunk_size):
+            chunk = hexshas[start:start + self.chunk_size]
+            self.process.stdin.write(
+                ''.join(hexsha + '\n' for hexsha in chunk).encode('ascii'))
+            self.process.stdin.flush()
+            for _ in chunk:
+                line = self.process.stdout.readline().split()
+                sizes.append(
+                    int(line[0]) if len(line) == 1 else None)
+        return sizes
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+def read_blob_prefix(path, hexsha, size, stream_size):
+    '''Returns the first size bytes of the blob, read by its own git
+    cat-file that is stopped after them. With core.bigFileThreshold set to
+    stream_size, git streams the blobs bigger than that instead of
+    inflating them whole first, so the rest of a big blob is not even
+    inflated. A process is started for every blob, so it pays off for the
+    big blobs only.
+    '''
+    process = subprocess.Popen(
+        ['git', '-c', 'core.bigFileThreshold={}'.format(stream_size),
+         'cat-file', 'blob', hexsha], cwd=path, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL)
+    try:
+        return process.stdout.read(size)
+    finally:
+        process.stdout.close()
+        process.wait()
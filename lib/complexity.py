@@ -0,0 +1,118 @@
+'''
+Functions calculating the complexity of the source code of a single file
+'''
+
+import functools
+
+from lib.indent_stats import process_indent_stats
+from lib.languages import LANGUAGES, remove_python_docstring
+
+
+# Characters removed by str.strip() that are encoded as one byte in utf-8
+ASCII_WHITESPACE = [9, 10, 11, 12, 13, 28, 29, 30, 31, 32]
+
+
+def analyze_complexity_data(data, language=None, ignore_one_char_lines=True):
+    '''Calculates the indentation statistics of a file.
+    Takes the content of the file as bytes or any other bytes-like
+    object, for example a memoryview. The comments and docstrings are
+    removed when language is the name of one of the LANGUAGES from
+    lib/languages.py. Empty lines (and the lines with only one
+    character when ignore_one_char_lines is True) are not counted.
+    Returns a dictionary like this:
+    {
+        "lines total": <number of lines in the file>,
+        "lines code": <number of lines that were counted>,
+        "stats": <result of process_indent_stats>
+    }
+    '''
+    language = LANGUAGES.get(language)
+    if language and language.text_filter:
+        data = language.text_filter(data)
+    lines = str(data, 'utf-8', 'ignore').split('\n')
+    lines_filtered = [
+        l for l in lines
+        if len(l.strip()) > (1 if ignore_one_char_lines else 0)]
+    if language and language.line_filter:
+        lines_filtered = language.line_filter(lines_filtered)
+    return {"lines total": len(lines), "lines code": len(lines_filtered),
+            "stats": process_indent_stats(indent_histogram(lines_filtered))}
+
+
+def indent_histogram(lines):
+    '''Returns the number of lines for every indentation found in the
+    lines, ordered by the indentation
+    '''
+    indent_stats = {}
+    for l in lines:
+        indent = len(l) - len(l.lstrip())
+        if indent not in indent_stats:
+            indent_stats[indent] = 1
+        else:
+            indent_stats[indent] = indent_stats[indent] + 1
+    indents = [k for k in indent_stats]
+    indents.sort()
+    return [indent_stats[i] for i in indents]
+
+
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    '''Returns the numpy module or None when NumPy is not installed.
+    NumPy is imported on the first call only, so the runs without the
+    vectorized analysis do not wait for it.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def analyze_complexity_data_vectorized(
+        data, language=None, ignore_one_char_lines=True):
+    '''Does the same as analyze_complexity_data, but finds the lines,
+    their indentation and the empty lines with NumPy working on the raw
+    bytes instead of splitting the text into python strings.
+    Only the lines that are left are turned into strings for the
+    languages with a line filter, like the docstrings of python files.
+    Falls back to analyze_complexity_data when NumPy is not installed
+    or the data is not pure ASCII, because then the bytes do not match
+    the characters counted by the original implementation.
+    '''
+    numpy = load_numpy()
+    if numpy is None:
+        return analyze_complexity_data(data, language, ignore_one_char_lines)
+    chars = numpy.frombuffer(data, dtype=numpy.uint8)
+    if len(chars) and chars.max() >= 0x80:
+        return analyze_complexity_data(data, language, ignore_one_char_lines)
+    language = LANGUAGES.get(language)
+    if language and language.text_filter:
+        data = language.text_filter(data)
+        chars = numpy.frombuffer(data, dtype=numpy.uint8)
+    new_lines = numpy.flatnonzero(chars == 10)
+    starts = numpy.concatenate(([0], new_lines + 1))
+    ends = numpy.concatenate((new_lines, [len(chars)]))
+    # the position after the end of the data is added to the non-whitespace
+    # characters so the search always finds something
+    text_chars = numpy.append(
+        numpy.flatnonzero(~numpy.isin(chars, ASCII_WHITESPACE)), len(chars))
+    first = numpy.searchsorted(text_chars, starts)
+    last = numpy.searchsorted(text_chars, ends) - 1
+    first_char = text_chars[first]
+    last_char = text_chars[numpy.maximum(last, 0)]
+    stripped_length = numpy.where(
+        first <= last, last_char - first_char + 1, 0)
+    keep = stripped_length > (1 if ignore_one_char_lines else 0)
+    if language and language.line_filter:
+        text = str(data, 'ascii')
+        lines_filtered = language.line_filter([
+            text[start:end]
+            for start, end in zip(starts[keep].tolist(), ends[keep].tolist())])
+        lines_code = len(lines_filtered)
+        hist = indent_histogram(lines_filtered)
+    else:
+        indents = (first_char - starts)[keep]
+        lines_code = len(indents)
+        hist = numpy.unique(indents, return_counts=True)[1].tolist()
+    return {"lines total": len(starts), "lines code": lines_code,
+            "stats": process_indent_stats(hist)}
@@ -0,0 +1,94 @@
+'''
+Content-addressed cache for the complexity analysis of git blobs
+'''
+
+import hashlib
+import json
+
+from lib.languages import FILTERS_VERSION
+
+
+def settings_fingerprint(ignored_files, ignore_one_char_lines, guard=None,
+                         paths=()):
+    '''Returns a short string identifying the analysis settings.
+    Two runs with the same ignore patterns, the same value of
+    ignore_one_char_lines, the same comment filters (see FILTERS_VERSION
+    in lib/languages.py) and the same limits of the BlobGuard (see
+    lib/blob_guard.py) get the same fingerprint, so it is safe to reuse
+    the results of one of them in the other. The paths the analysis is
+    limited to change the results of the commits, not of the blobs.
+    '''
+    settings = [
+        list(ignored_files), bool(ignore_one_char_lines), FILTERS_VERSION]
+    if guard is not None:
+        settings.append(guard.settings())
+    if paths:
+        settings.append(sorted(paths))
+    data = json.dumps(settings)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+
+class ComplexityCache:
+    '''Keeps the results of analyze_complexity keyed by the blob SHA.
+    A blob that did not change between commits has the same SHA, so it is
+    analyzed only once per run no matter how many trees contain it.
+    When a store (see lib/analysis_store.py) is given, the results are
+    also saved there and reused by the next runs.
+    When record_type is given, the results are kept in memory as
+    record_type.from_dict(result), for example BlobComplexity from
+    lib/records.py, while the store always gets the original results.
+    guard is the BlobGuard the blobs are analyzed with.
+    '''
+
+    def __init__(self, ignored_files, ignore_one_char_lines, store=None,
+                 record_type=None, guard=None):
+        self.fingerprint = settings_fingerprint(
+            ignored_files, ignore_one_char_lines, guard)
+        self.store = store
+        self.record_type = record_type
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, blob_sha, language):
+        '''Builds the cache key for a blob.
+        The language is a part of the key because the same content
+        is analyzed differently depending on the language of the file
+        (see lib/languages.py)
+        '''
+        return "{}:{}:{}".format(blob_sha, language or '', self.fingerprint)
+
+    def get(self, key):
+        '''Returns the result for the key from memory or from the store.
+        Returns None when the blob was not analyzed yet.
+        '''
+        if key in self.results:
+            self.hits += 1
+            return self.results[key]
+        result = self.store.get_blob(key) if self.store else None
+        if result is None:
+            return None
+        self.hits += 1
+        return self._keep(key, result)
+
+    def put(self, key, result):
+        '''Saves the result and returns what is kept in memory for it'''
+        self.misses += 1
+        if self.store:
+            self.store.put_blob(key, result)
+        return self._keep(key, result)
+
+    def lookup(self, key, compute):
+        '''Returns the cached result for the key.
+        On a miss calls compute() and stores what it returns.
+        '''
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, compute())
+        return result
+
+    def _keep(self, key, result):
+        if self.record_type:
+            result = self.record_type.from_dict(result)
+        self.results[key] = result
+        return result
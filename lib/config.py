@@ -0,0 +1,125 @@
+'''
+Settings of the analysis of one repository. Kept apart from lib/analyzer.py
+with only light imports, so the settings are read without loading git and
+the analysis modules.
+'''
+
+import os.path
+
+import yaml
+
+from lib.blob_guard import BlobGuard
+from lib.sampling import GRANULARITIES
+from lib.xlsx_report import REPORT_REVISIONS
+
+
+class AnalysisError(Exception):
+    '''The analysis cannot be done, the message tells why'''
+
+
+class Config:
+    '''Settings of the analysis of one repository, the same as in
+    git_analysis.yml. path, report and ignored_files are required,
+    the rest have defaults.
+    '''
+
+    defaults = {
+        "report_format": 'xlsx',
+        "ignore_one_char_lines": True,
+        "since": None,
+        "until": None,
+        "first_parent": False,
+        "rev_range": 'HEAD',
+        "paths": [],
+        "granularity": 'all',
+        "every_n": 1,
+        "show_deleted_files": False,
+        "streaming_report": False,
+        "incremental": False,
+        "workers": 1,
+        "vectorized": False,
+        "tree_cache_size": 10000,
+        "file_revisions": REPORT_REVISIONS,
+        "max_blob_size": 10 << 20,
+        "sample_blob_size": 1 << 20,
+        "large_blob_size": 256 << 10,
+        "skip_binary_files": True,
+        "store": None,
+        "metrics_log": None,
+        "results_index": None,
+    }
+
+    def __init__(self, path, report, ignored_files, **settings):
+        unknown = set(settings) - set(self.defaults)
+        if unknown:
+            raise ValueError("Unknown settings: {}".format(
+                ", ".join(sorted(unknown))))
+        self.path = path
+        self.report = report
+        self.ignored_files = ignored_files or []
+        for name, value in self.defaults.items():
+            setattr(self, name, settings.get(name, value))
+        for name in ("since", "until"):
+            value = getattr(self, name)
+            if isinstance(value, str):
+                import dateutil.parser
+                setattr(self, name, dateutil.parser.parse(value))
+        if self.granularity not in GRANULARITIES:
+            raise ValueError(
+                "Unknown granularity {}, expected one of {}".format(
+                    self.granularity, ", ".join(GRANULARITIES)))
+
+    def rev_list_options(self):
+        '''Returns the git rev-list options selecting the analyzed commits,
+        so the history is pruned by git itself
+        '''
+        options = {}
+        if self.since:
+            options["since"] = self.since.isoformat()
+        if self.until:
+            options["until"] = self.until.isoformat()
+        if self.first_parent:
+            options["first_parent"] = True
+        return options
+
+    def blob_guard(self):
+        '''Returns the BlobGuard with the limits of the config'''
+        return BlobGuard(
+            self.max_blob_size, self.sample_blob_size, self.large_blob_size,
+            self.skip_binary_files)
+
+    @classmethod
+    def from_dict(cls, data, base_dir=''):
+        '''Makes the Config from the settings as read from the YAML file.
+        The relative paths of the repository, the report, the store, the
+        metrics log and the results index are taken relative to base_dir.
+        Unknown settings are ignored.
+        '''
+        try:
+            settings = {name: data[name]
+                        for name in cls.defaults if name in data}
+            for name in ("store", "metrics_log", "results_index"):
+                if settings.get(name):
+                    settings[name] = os.path.join(base_dir, settings[name])
+            return cls(
+                os.path.join(base_dir, data["path"]),
+                os.path.join(base_dir, data["report"]),
+                data["ignored_files"], **settings)
+        except KeyError as e:
+            raise ValueError(
+                "Cannot find a required config parameter {}".format(e))
+
+    @classmethod
+    def load(cls, file_name):
+        '''Reads the Config from a YAML file, the relative paths in it are
+        relative to the directory of the file.
+        Raises ValueError when the file is not valid.
+        '''
+        with open(file_name) as yml_file:
+            try:
+                data = yaml.safe_load(yml_file)
+            except yaml.YAMLError as e:
+                raise ValueError(
+                    "Cannot parse the settings file {}: {}".format(
+                        file_name, e))
+        return cls.from_dict(data or {}, os.path.dirname(file_name))
@@ -2,6 +2,7 @@
 '''Functions performing operations on names of files'''
 
 
+import functools
 import re
 
 
@@ -39,3 +40,90 @@ def ignore_file(filename, ignored_files):
     for ignore_pattern in ignored_files:
         if re.search(ignore_pattern, filename):
             return True
+
+
+class IgnoreMatcher:
+    '''Does the same as ignore_file, but the list of the patterns is compiled
+    once into a single regular expression and the decisions are memoized
+    per path. Calling the matcher with a file name returns True when the
+    file is ignored and None otherwise.
+    '''
+
+    def __init__(self, ignored_files, memo_size=1 << 16):
+        self.patterns = list(ignored_files)
+        self.regexes = self._compile(self.patterns)
+        self.directory_regexes = [
+            re.compile(pattern) for pattern in self.patterns
+            if self._prefix_pattern(pattern)]
+        self._match = functools.lru_cache(maxsize=memo_size)(self._match)
+        self.ignore_directory = functools.lru_cache(maxsize=memo_size)(
+            self.ignore_directory)
+
+    def __call__(self, filename):
+        if not filename:
+            return None
+        return self._match(filename)
+
+    def _match(self, filename):
+        for regex in self.regexes:
+            if regex.search(filename):
+                return True
+
+    def ignore_directory(self, path):
+        '''Tells if all the files in the directory are ignored, so there is
+        no need to look into it. Only the patterns that match the path of
+        the directory without looking after it are used, for example
+        '^vendor' or 'test/'. Patterns like '^vendor$' or with lookaheads
+        could match the directory and not the files in it.
+        '''
+        path = path + '/'
+        for regex in self.directory_regexes:
+            if regex.search(path):
+                return True
+        return False
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return []
+        # Backreferences would point to wrong groups in the combined regex
+        if not any(re.search(r'\\[1-9]|\(\?P=', p) for p in patterns):
+            try:
+                return [re.compile(
+                    '|'.join('(?:{})'.format(p) for p in patterns))]
+            except re.error:
+                pass
+        return [re.compile(pattern) for pattern in patterns]
+
+    @staticmethod
+    def _prefix_pattern(pattern):
+        '''Tells if a match of the pattern depends only on the matched text
+        and the text before it
+        '''
+        return not re.search(r'\$|\\[ZbB]|\(\?[^:P]|\(\?P=', pattern)
+
+
+class PathMatcher:
+    '''Tells which files are within the paths the analysis is limited to,
+    the way git limits the history to them: a path selects the file with
+    that name and all the files in the directory with that name. With no
+    paths all the files are selected. Calling the matcher with a file name
+    returns True when the file is selected.
+    '''
+
+    def __init__(self, paths):
+        self.paths = [path.strip('/') for path in paths]
+        if any(path in ('', '.') for path in self.paths):
+            self.paths = []
+
+    def __call__(self, filename):
+        return not self.paths or any(
+            filename == path or filename.startswith(path + '/')
+            for path in self.paths)
+
+    def visit_directory(self, path):
+        '''Tells if the directory can contain selected files, that is it is
+        selected itself or it is on the way to a selected path
+        '''
+        return self(path) or any(
+            selected.startswith(path + '/') for selected in self.paths)
@@ -0,0 +1,145 @@
+'''
+Streaming parser of git log with the raw and numstat output, the changed
+files and the churn statistics of the whole history are read from one git
+process instead of running a diff for every commit
+'''
+
+import subprocess
+
+
+LOG_FORMAT = '%x00%H %ct'
+CHUNK_SIZE = 65536
+
+
+class FileChange:
+    '''One changed file of a commit. old_path is None for an added file,
+    new_path is None for a deleted one, for a renamed file both are set
+    and differ. The modes are octal strings as printed by git.
+    '''
+    __slots__ = (
+        'status', 'old_path', 'new_path', 'old_mode', 'new_mode',
+        'old_hexsha', 'new_hexsha', 'insertions', 'deletions')
+
+    def __init__(self, status, old_path, new_path, old_mode, new_mode,
+                 old_hexsha, new_hexsha, insertions=0, deletions=0):
+        self.status = status
+        self.old_path = old_path
+        self.new_path = new_path
+        self.old_mode = old_mode
+        self.new_mode = new_mode
+        self.old_hexsha = old_hexsha
+        self.new_hexsha = new_hexsha
+        self.insertions = insertions
+        self.deletions = deletions
+
+
+class LogCommit:
+    '''A commit of the log with the list of its FileChange, the timestamp
+    is the commit date
+    '''
+    __slots__ = ('hexsha', 'timestamp', 'changes')
+
+    def __init__(self, hexsha, timestamp, changes):
+        self.hexsha = hexsha
+        self.timestamp = timestamp
+        self.changes = changes
+
+
+def split_stream(stream, chunk_size=CHUNK_SIZE):
+    '''Yields the NUL separated fields of the binary stream, the stream is
+    read in chunks of chunk_size bytes
+    '''
+    rest = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        fields = (rest + chunk).split(b'\0')
+        rest = fields.pop()
+        yield from fields
+    if rest:
+        yield rest
+
+
+def _count(value):
+    '''numstat shows "-" instead of the numbers for binary files'''
+    return 0 if value == '-' else int(value)
+
+
+def parse_log(fields):
+    '''Yields LogCommit for every commit of the fields of the output of
+    git log -z --raw --numstat --format=LOG_FORMAT.
+    The raw lines and the numstat lines of a commit come in the same order,
+    the churn statistics of the numstat lines are added to the changes
+    made from the raw lines.
+    '''
+    fields = iter(fields)
+    commit = None
+    numstat = []
+    for field in fields:
+        field = field.lstrip('\n')
+        if not field:
+            continue
+        if field[0] == ':':
+            old_mode, new_mode, old_hexsha, new_hexsha, status = (
+                field[1:].split(' '))
+            old_path = new_path = next(fields)
+            if status[0] in 'RC':
+                new_path = next(fields)
+            if status[0] in 'AC':
+                old_path = None
+            elif status[0] == 'D':
+                new_path = None
+            commit.changes.append(FileChange(
+                status[0], old_path, new_path, old_mode, new_mode,
+                old_hexsha, new_hexsha))
+        elif '\t' in field:
+            insertions, deletions, path = field.split('\t', 2)
+            if not path:
+                # A renamed file, the old and the new path follow
+                next(fields)
+                next(fields)
+            numstat.append((_count(insertions), _count(deletions)))
+        else:
+            if commit:
+                yield _add_numstat(commit, numstat)
+            hexsha, timestamp = field.split(' ')
+            commit = LogCommit(hexsha, int(timestamp), [])
+            numstat = []
+    if commit:
+        yield _add_numstat(commit, numstat)
+
+
+def _add_numstat(commit, numstat):
+    for change, (insertions, deletions) in zip(commit.changes, numstat):
+        change.insertions = insertions
+        change.deletions = deletions
+    return commit
+
+
+def iter_log(repo, rev='HEAD', paths=(), **options):
+    '''Yields LogCommit for every commit of the history from the oldest
+    to the latest one. The changes of a merge commit are the diff against
+    its first parent, the renamed files are detected. options are passed
+    to git rev-list, for example since, until or first_parent.
+    The commits are listed by git rev-list and passed to git log, so the
+    same commits are walked as counted by git rev-list --count. git log
+    with paths would walk also the merges dropped by the history
+    simplification of rev-list.
+    Raises GitCommandError when git fails.
+    '''
+    revisions = repo.git.rev_list(
+        rev, '--', *paths, reverse=True, **options)
+    if not revisions:
+        return
+    process = repo.git.log(
+        '--', *paths, z=True, raw=True, numstat=True, M=True,
+        no_abbrev=True, no_walk='unsorted', stdin=True,
+        diff_merges='first-parent', format=LOG_FORMAT, as_process=True,
+        istream=subprocess.PIPE)
+    process.stdin.write(revisions.encode() + b'\n')
+    process.stdin.close()
+    yield from parse_log(
+        field.decode('utf-8', 'replace')
+        for field in split_stream(process.stdout))
+    process.wait()
@@ -47,3 +47,18 @@ def join_histogram(a, b):
     return [
         (a if a is not None else 0) + (b if b is not None else 0)
         for (a, b) in zip_longest(a, b)]
+
+
+def subtract_histogram(a, b):
+    '''Subtracts the histogram b from a, the opposite of join_histogram.
+    The trailing zeroes are removed, so the result is the same as if
+    the histogram was joined without b.
+    Example: Subtracting [2, 3] from [3, 5, 3] will return [1, 2, 3],
+    subtracting [2, 3] from [3, 3] will return [1]
+    '''
+    result = [
+        (a if a is not None else 0) - (b if b is not None else 0)
+        for (a, b) in zip_longest(a, b)]
+    while result and result[-1] == 0:
+        result.pop()
+    return result
@@ -0,0 +1,78 @@
+'''
+Size of the analysis of a repository from the git metadata only, without
+reading the content of any file, to plan the runs before starting them
+'''
+
+import subprocess
+
+from lib.config import AnalysisError
+from lib.file_names import IgnoreMatcher
+from lib.sampling import sample_commits
+
+
+def git_options(options):
+    '''Returns the command line arguments for the options returned by
+    Config.rev_list_options
+    '''
+    return ['--' + name.replace('_', '-') +
+            ('' if value is True else '=' + str(value))
+            for name, value in options.items()]
+
+
+def run_git(path, *arguments):
+    '''Returns the output of the git command in the repository.
+    Raises AnalysisError when the command fails.
+    '''
+    try:
+        return subprocess.run(
+            ['git', '-C', path] + list(arguments), stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, check=True).stdout
+    except OSError as e:
+        raise AnalysisError("Cannot run git: {}".format(e))
+    except subprocess.CalledProcessError as e:
+        raise AnalysisError("Cannot read the repository {}: {}".format(
+            path, e.stderr.decode(errors='replace').strip()))
+
+
+def count_job(config):
+    '''Returns a dictionary with the number of the commits to walk, the
+    number of the commits to analyze (fewer with a sampling granularity),
+    the number of the files in the latest commit that are within the paths
+    and not ignored and their size in bytes. Only the commit graph and the
+    trees of the latest commit are read.
+    '''
+    rev_list = (['rev-list'] + git_options(config.rev_list_options()) +
+                [config.rev_range])
+    paths = ['--'] + list(config.paths)
+    commits = int(run_git(config.path, *rev_list, '--count', *paths))
+    analyzed_commits = commits
+    if config.granularity != 'all':
+        first_parent_commits = []
+        for line in run_git(
+                config.path, *rev_list, '--first-parent', '--timestamp',
+                *paths).decode().splitlines():
+            timestamp, hexsha = line.split()
+            first_parent_commits.append((hexsha, int(timestamp)))
+        analyzed_commits = len(sample_commits(
+            first_parent_commits, config.granularity, config.every_n))
+    files = 0
+    size = 0
+    latest = run_git(
+        config.path, *rev_list, '--max-count=1', *paths).decode().strip()
+    if latest:
+        ignore_matcher = IgnoreMatcher(config.ignored_files)
+        for entry in run_git(
+                config.path, 'ls-tree', '-r', '-l', '-z', latest,
+                *paths).split(b'\0'):
+            if not entry:
+                continue
+            info, path = entry.split(b'\t', 1)
+            _, item_type, _, item_size = info.split()
+            if item_type != b'blob' or ignore_matcher(
+                    path.decode(errors='surrogateescape')):
+                continue
+            files += 1
+            size += int(item_size)
+    return {"path": config.path, "commits": commits,
+            "analyzed_commits": analyzed_commits, "files": files,
+            "size": size}
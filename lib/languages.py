@@ -0,0 +1,124 @@
+'''
+Registry of the languages the comments and docstrings are removed from
+before the complexity analysis. The language of a file is decided by the
+extension of its path.
+'''
+
+import os.path
+import re
+
+
+class Language:
+    '''A language with its comment filters.
+    text_filter takes the content of a file as bytes and returns it
+    without the comments in one pass, keeping the number of lines, so
+    the lines with only a comment become empty and are not counted.
+    line_filter takes the list of the lines that are counted and returns
+    the lines that are left.
+    '''
+    __slots__ = ('name', 'extensions', 'text_filter', 'line_filter')
+
+    def __init__(self, name, extensions, text_filter=None, line_filter=None):
+        self.name = name
+        self.extensions = extensions
+        self.text_filter = text_filter
+        self.line_filter = line_filter
+
+
+LANGUAGES = {}
+_extensions = {}
+# Changed with the filters of the registered languages, so the results
+# of the older filters kept in a store are not reused
+FILTERS_VERSION = 2
+
+
+def register_language(name, extensions, text_filter=None, line_filter=None):
+    '''Registers a language for the file extensions (with the dot,
+    for example ".py"), replacing a language registered before for them
+    '''
+    language = Language(name, extensions, text_filter, line_filter)
+    LANGUAGES[name] = language
+    for extension in extensions:
+        _extensions[extension.lower()] = name
+    return language
+
+
+def language_for_path(path):
+    '''Returns the name of the language of the file or None when its
+    comments are not removed
+    '''
+    return _extensions.get(os.path.splitext(path)[1].lower())
+
+
+def remove_python_docstring(lines):
+    '''Removes the shebang and the docstrings of the modules, classes and
+    functions from the list of lines of a python file
+    '''
+    result = []
+    wait_for_docstring = True
+    in_docstring = False
+    for line in lines:
+        linestrip = line.strip()
+        if wait_for_docstring and line.startswith('#!'):
+            continue
+        if wait_for_docstring and (
+                linestrip.startswith("'''") or linestrip.startswith('"""')):
+            in_docstring = True
+            wait_for_docstring = False
+            if linestrip == "'''" or linestrip == '"""':
+                continue
+        if in_docstring and (
+                linestrip.endswith("'''") or linestrip.endswith('"""')):
+            in_docstring = False
+            continue
+        if in_docstring:
+            continue
+        result.append(line)
+        if (linestrip.startswith('def ') or linestrip.startswith("class ")):
+            wait_for_docstring = True
+    return result
+
+
+# The string and character literals are matched too, so the comment
+# markers inside them are left alone. An unterminated block comment
+# goes to the end of the file.
+C_TOKENS = re.compile(
+    rb'"(?:\\.|[^"\\\n])*"'
+    rb"|'(?:\\.|[^'\\\n])*'"
+    rb'|//[^\n]*'
+    rb'|/\*.*?(?:\*/|\Z)', re.DOTALL)
+
+
+def _c_token(match):
+    token = match.group()
+    if token[:1] != b'/':
+        return token
+    return b'\n' * token.count(b'\n')
+
+
+def remove_c_comments(data):
+    '''Removes the // and /* */ comments'''
+    return C_TOKENS.sub(_c_token, data)
+
+
+HASH_COMMENT_LINES = re.compile(rb'^[ \t]*#[^\n]*', re.MULTILINE)
+
+
+def remove_hash_comment_lines(data):
+    '''Removes the lines that contain only a # comment'''
+    return HASH_COMMENT_LINES.sub(b'', data)
+
+
+register_language(
+    'python', ['.py', '.pyw', '.pyi'], text_filter=remove_hash_comment_lines,
+    line_filter=remove_python_docstring)
+register_language(
+    'c', ['.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx', '.m',
+          '.mm', '.java', '.kt', '.kts', '.scala', '.groovy', '.cs', '.go',
+          '.rs', '.swift', '.dart', '.js', '.jsx', '.mjs', '.ts', '.tsx'],
+    text_filter=remove_c_comments)
+register_language(
+    'shell', ['.sh', '.bash', '.zsh', '.ksh'],
+    text_filter=remove_hash_comment_lines)
+register_language(
+    'yaml', ['.yml', '.yaml'], text_filter=remove_hash_comment_lines)
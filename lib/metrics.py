@@ -0,0 +1,172 @@
+'''
+Instrumentation of the analysis: the time spent in every stage, the
+counters of the processed blobs and the slowest files, optionally written
+into a log with one JSON object per line
+'''
+
+import heapq
+import json
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    '''Collects the metrics of one run.
+    The time of a stage is added up over all its calls, the stages
+    measured in the worker processes (blob_read and analyze_complexity)
+    are the sums of the time of all the workers. With log_file set, the
+    progress is written there every interval seconds and the summary at
+    the end, every line is a JSON object with the key "event".
+    '''
+
+    def __init__(self, log_file=None, slowest_files=10, interval=5.0):
+        self.stages = {}
+        self.counters = {}
+        self.slowest_files = slowest_files
+        self.slowest = []
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_progress = self.start
+        self.log = open(log_file, 'w') if log_file else None
+
+    @contextmanager
+    def stage(self, name):
+        '''Measures the time of the with block as a part of the stage'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def timed(self, name, iterable):
+        '''Yields the items of the iterable, the time spent waiting for
+        them is added to the stage
+        '''
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - start)
+                return
+            self.add_time(name, time.perf_counter() - start)
+            yield item
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_blob(self, path, size, read_seconds, analyze_seconds):
+        '''Counts one analyzed blob and keeps the slowest ones'''
+        self.count("blobs")
+        self.count("bytes_read", size)
+        self.add_time("blob_read", read_seconds)
+        self.add_time("analyze_complexity", analyze_seconds)
+        item = (analyze_seconds, path, size)
+        if len(self.slowest) < self.slowest_files:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def rates(self, cache_hits=0, cache_misses=0):
+        '''Returns the throughput and the cache hit rate'''
+        elapsed = self.elapsed() or 1e-9
+        lookups = cache_hits + cache_misses
+        return {
+            "blobs_per_second": round(
+                self.counters.get("blobs", 0) / elapsed, 1),
+            "bytes_per_second": round(
+                self.counters.get("bytes_read", 0) / elapsed),
+            "cache_hit_rate": (
+                round(cache_hits / lookups, 4) if lookups else None)}
+
+    def write(self, event, **values):
+        '''Writes one line of the log'''
+        if self.log:
+            values["event"] = event
+            values["elapsed"] = round(self.elapsed(), 3)
+            self.log.write(json.dumps(values) + '\n')
+            self.log.flush()
+
+    def progress(self, commits, cache_hits=0, cache_misses=0):
+        '''Writes the progress when interval seconds passed since the last
+        time
+        '''
+        now = time.perf_counter()
+        if not self.log or now - self.last_progress < self.interval:
+            return
+        self.last_progress = now
+        self.write(
+            "progress", commits=commits, counters=self.counters,
+            **self.rates(cache_hits, cache_misses))
+
+    def summary(self, cache_hits=0, cache_misses=0):
+        '''Returns all the metrics as a dictionary'''
+        summary = {
+            "elapsed": round(self.elapsed(), 3),
+            "stages": {name: round(seconds, 3)
+                       for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+            "slowest_files": [
+                {"path": path, "size": size, "seconds": round(seconds, 6)}
+                for seconds, path, size in sorted(self.slowest, reverse=True)]}
+        summary.update(self.rates(cache_hits, cache_misses))
+        return summary
+
+    def close(self, cache_hits=0, cache_misses=0):
+        '''Writes the summary and closes the log'''
+        if self.log:
+            self.write("summary", **self.summary(cache_hits, cache_misses))
+            self.log.close()
+            self.log = None
+
+
+PROFILE_MODES = ['cprofile', 'tracemalloc']
+
+
+class Profiler:
+    '''Profiles the run with cProfile or tracemalloc and prints the top
+    entries at the end. The cProfile statistics are also saved to
+    output_file when it is given, to be loaded by pstats or snakeviz.
+    '''
+
+    def __init__(self, mode, output_file=None, top=20):
+        if mode not in PROFILE_MODES:
+            raise ValueError("Unknown profile mode {}, expected one of {}"
+                             .format(mode, ", ".join(PROFILE_MODES)))
+        self.mode = mode
+        self.output_file = output_file
+        self.top = top
+        self.profile = None
+
+    def start(self):
+        if self.mode == 'cprofile':
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start()
+
+    def stop(self):
+        if self.mode == 'cprofile':
+            import pstats
+            self.profile.disable()
+            if self.output_file:
+                self.profile.dump_stats(self.output_file)
+            pstats.Stats(self.profile).sort_stats(
+                'cumulative').print_stats(self.top)
+        else:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print("Peak memory: {:.1f} MiB".format(peak / (1 << 20)))
+            for statistic in snapshot.statistics('lineno')[:self.top]:
+                print(statistic)
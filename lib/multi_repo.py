@@ -0,0 +1,93 @@
+'''
+Analysis of many repositories at once. Every repository is analyzed by
+its own Analyzer in a thread, asyncio limits how many of them run at the
+same time. All of them share one ComplexityCache, so the blobs common to
+several repositories, for example in forks, are analyzed only once.
+'''
+
+import asyncio
+import json
+import os
+import sqlite3
+
+from git.exc import GitCommandError
+
+from lib.analyzer import AnalysisError, analyze_repository
+from lib.complexity_cache import ComplexityCache
+from lib.records import BlobComplexity
+
+
+def cache_settings(config):
+    return (config.ignore_one_char_lines,
+            tuple(config.blob_guard().settings()))
+
+
+async def analyze_repositories(configs, concurrency=4):
+    '''Analyzes the repositories of the list of Config, at most concurrency
+    of them at the same time, and writes the report of every one of them.
+    Returns the list of the summaries in the order of the configs, see
+    Analyzer.summary. The summary of a repository that could not be
+    analyzed has only the path, the report and the error message.
+    The results of a blob depend on ignore_one_char_lines and the limits
+    of the BlobGuard, so the configs with the same values share one cache.
+    The configs with the same store are analyzed one after another, the
+    writes of one run would keep the store locked for the others.
+    '''
+    caches = {}
+    for config in configs:
+        settings = cache_settings(config)
+        if settings not in caches:
+            caches[settings] = ComplexityCache(
+                [], config.ignore_one_char_lines, record_type=BlobComplexity,
+                guard=config.blob_guard())
+    store_locks = {
+        os.path.abspath(config.store): asyncio.Lock()
+        for config in configs if config.store}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze(config):
+        store_lock = (store_locks[os.path.abspath(config.store)]
+                      if config.store else asyncio.Lock())
+        async with store_lock, semaphore:
+            try:
+                return await asyncio.to_thread(
+                    analyze_repository, config,
+                    caches[cache_settings(config)])
+            except (AnalysisError, GitCommandError, OSError, ValueError,
+                    sqlite3.Error) as e:
+                return {"path": config.path, "report": config.report,
+                        "error": str(e)}
+
+    return await asyncio.gather(*[analyze(config) for config in configs])
+
+
+def combined_summary(summaries):
+    '''Returns the summaries of all the repositories with the totals'''
+    analyzed = [summary for summary in summaries if "error" not in summary]
+    return {
+        "repositories": summaries,
+        "total": {
+            "repositories": len(summaries),
+            "failed": len(summaries) - len(analyzed),
+            "commits": sum(summary["commits"] for summary in analyzed),
+            "files": sum(summary["files"] for summary in analyzed),
+            "lines_code": sum(
+                summary["lines_code"] or 0 for summary in analyzed)}}
+
+
+def write_summary(summary_file, summaries):
+    '''Writes the combined summary as JSON'''
+    with open(summary_file, 'w') as output_file:
+        json.dump(combined_summary(summaries), output_file, indent=2)
+
+
+def print_summary(summaries):
+    print("{:<40}{:>9}{:>8}{:>12}{:>12}".format(
+        "Repository", "Commits", "Files", "Code lines", "Complexity"))
+    for summary in summaries:
+        if "error" in summary:
+            print("{:<40} {}".format(summary["path"], summary["error"]))
+            continue
+        print("{:<40}{:>9}{:>8}{:>12}{:>12.3f}".format(
+            summary["path"], summary["commits"], summary["files"],
+            summary["lines_code"] or 0, summary["complexity"] or 0.0))
@@ -0,0 +1,86 @@
+'''
+Compact records keeping the analysis results in memory
+'''
+
+from array import array
+from collections import deque
+
+from lib.indent_stats import process_indent_stats
+
+
+class CommitTable:
+    '''Keeps the ids of the analyzed commits in one bytearray, 20 bytes per
+    commit. The records refer to the commits by their index in the table
+    instead of keeping the 40 characters long hex strings.
+    '''
+
+    def __init__(self):
+        self.ids = bytearray()
+
+    def __len__(self):
+        return len(self.ids) // 20
+
+    def add(self, hexsha):
+        '''Adds the commit and returns its index'''
+        self.ids += bytes.fromhex(hexsha)
+        return len(self) - 1
+
+    def hexsha(self, index):
+        return self.ids[index * 20:(index + 1) * 20].hex()
+
+
+class BlobComplexity:
+    '''Complexity of one blob: the numbers of lines and the indentation
+    histogram as an array of unsigned integers. The rest of the statistics
+    is calculated from the histogram when it is needed.
+    '''
+    __slots__ = ('lines_total', 'lines_code', 'hist')
+
+    def __init__(self, lines_total, lines_code, hist):
+        self.lines_total = lines_total
+        self.lines_code = lines_code
+        self.hist = array('I', hist)
+
+    @classmethod
+    def from_dict(cls, result):
+        '''Takes the dictionary returned by analyze_complexity_data'''
+        return cls(
+            result["lines total"], result["lines code"],
+            result["stats"]["hist"])
+
+    @property
+    def stats(self):
+        '''Returns the result of process_indent_stats for the histogram'''
+        return process_indent_stats(self.hist)
+
+
+class FileRevision:
+    '''Complexity of a file in a commit, the commit is an index in
+    the CommitTable. The complexity may be evaluated lazily, it is None
+    then and blob is the git Blob to analyze.
+    '''
+    __slots__ = ('commit', 'complexity', 'blob')
+
+    def __init__(self, commit, complexity, blob=None):
+        self.commit = commit
+        self.complexity = complexity
+        self.blob = blob
+
+
+class FileStats:
+    '''Statistics of one file over the analyzed history.
+    revisions is a deque of FileRevision from the latest to the oldest one,
+    with max_revisions set only that many latest revisions are kept.
+    '''
+    __slots__ = (
+        'name', 'commits', 'lines', 'insertions', 'deletions', 'deleted',
+        'revisions')
+
+    def __init__(self, name, max_revisions=None):
+        self.name = name
+        self.commits = 0
+        self.lines = 0
+        self.insertions = 0
+        self.deletions = 0
+        self.deleted = False
+        self.revisions = deque(maxlen=max_revisions)
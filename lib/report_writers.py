@@ -0,0 +1,190 @@
+'''
+Report writers producing the results in different formats.
+Every writer has the same interface as XlsxReport: add_commit is called
+for every analyzed commit, write_files once at the end and then close.
+'''
+
+import csv
+import gzip
+import importlib.util
+import json
+import os.path
+
+from lib.xlsx_report import XlsxReport
+
+
+COMMIT_COLUMNS = ["commit", "date", "cnt", "avg", "stddev", "max", "hist"]
+FILE_COLUMNS = [
+    "path", "commits", "lines", "insertions", "deletions", "deleted",
+    "revision", "commit", "lines_code", "avg", "stddev", "max", "hist"]
+
+
+def commit_row(commit_stats_item):
+    '''Returns the values of COMMIT_COLUMNS for a commit'''
+    stats = commit_stats_item["stats"]
+    return [
+        commit_stats_item["commit"], commit_stats_item["date"], stats["cnt"],
+        stats["avg"], stats["stddev"], stats["max"], list(stats["hist"])]
+
+
+def file_rows(file_stats, commits, show_deleted_files):
+    '''Yields the values of FILE_COLUMNS for every kept revision of every
+    file, the revision 0 is the latest one. A file without revisions
+    gets one row with empty revision columns.
+    commits is the CommitTable the revisions refer to.
+    '''
+    for _, file in sorted(
+            [(file_stats[file].name, file) for file in file_stats]):
+        file_data = file_stats[file]
+        if file_data.deleted and not show_deleted_files:
+            continue
+        file_columns = [
+            file_data.name, file_data.commits, file_data.lines,
+            file_data.insertions, file_data.deletions, file_data.deleted]
+        if not file_data.revisions:
+            yield file_columns + [None] * 7
+        for revision, file_revision in enumerate(file_data.revisions):
+            complexity = file_revision.complexity
+            stats = complexity.stats
+            yield file_columns + [
+                revision, commits.hexsha(file_revision.commit),
+                complexity.lines_code, stats["avg"], stats["stddev"],
+                stats["max"], list(complexity.hist)]
+
+
+class CsvReport:
+    '''Writes the commits and the files into two gzipped CSV files,
+    <report>.commits.csv.gz and <report>.files.csv.gz.
+    Every row is written right away, the histograms are written as
+    JSON lists.
+    '''
+
+    extension = '.csv.gz'
+
+    def __init__(self, report_file, show_deleted_files=False):
+        self.base_name = os.path.splitext(report_file)[0]
+        self.show_deleted_files = show_deleted_files
+        self.commit_file, self.commit_writer = self._open(
+            'commits', COMMIT_COLUMNS)
+
+    def _open(self, table, columns):
+        csv_file = gzip.open(
+            self.base_name + '.' + table + self.extension, 'wt',
+            newline='', encoding='utf-8')
+        writer = csv.writer(csv_file)
+        writer.writerow(columns)
+        return csv_file, writer
+
+    @staticmethod
+    def _csv_row(row):
+        return [json.dumps(value) if isinstance(value, list) else value
+                for value in row]
+
+    def add_commit(self, commit_stats_item):
+        self.commit_writer.writerow(
+            self._csv_row(commit_row(commit_stats_item)))
+
+    def write_files(self, file_stats, commits):
+        file_file, file_writer = self._open('files', FILE_COLUMNS)
+        for row in file_rows(file_stats, commits, self.show_deleted_files):
+            file_writer.writerow(self._csv_row(row))
+        file_file.close()
+
+    def close(self):
+        self.commit_file.close()
+
+
+class ArrowReport:
+    '''Writes the commits and the files into Parquet files or Arrow IPC
+    files, <report>.commits.<format> and <report>.files.<format>.
+    The rows are collected into chunks of chunk_size rows, every chunk
+    is written as a separate record batch, so the whole result set is
+    never kept in memory.
+    '''
+
+    chunk_size = 10000
+
+    def __init__(self, report_file, show_deleted_files=False,
+                 report_format='parquet'):
+        self.base_name = os.path.splitext(report_file)[0]
+        self.show_deleted_files = show_deleted_files
+        self.report_format = report_format
+        import pyarrow
+        self.commit_schema = pyarrow.schema([
+            ("commit", pyarrow.string()), ("date", pyarrow.string()),
+            ("cnt", pyarrow.int64()), ("avg", pyarrow.float64()),
+            ("stddev", pyarrow.float64()), ("max", pyarrow.int64()),
+            ("hist", pyarrow.list_(pyarrow.uint32()))])
+        self.file_schema = pyarrow.schema([
+            ("path", pyarrow.string()), ("commits", pyarrow.int64()),
+            ("lines", pyarrow.int64()), ("insertions", pyarrow.int64()),
+            ("deletions", pyarrow.int64()), ("deleted", pyarrow.bool_()),
+            ("revision", pyarrow.int64()), ("commit", pyarrow.string()),
+            ("lines_code", pyarrow.int64()), ("avg", pyarrow.float64()),
+            ("stddev", pyarrow.float64()), ("max", pyarrow.int64()),
+            ("hist", pyarrow.list_(pyarrow.uint32()))])
+        self.commit_writer = self._open('commits', self.commit_schema)
+        self.commit_rows = []
+
+    def _open(self, table, schema):
+        file_name = self.base_name + '.' + table + '.' + self.report_format
+        if self.report_format == 'parquet':
+            import pyarrow.parquet
+            return pyarrow.parquet.ParquetWriter(file_name, schema)
+        import pyarrow.ipc
+        return pyarrow.ipc.new_file(file_name, schema)
+
+    @staticmethod
+    def _write_chunk(writer, schema, rows):
+        if rows:
+            import pyarrow
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type)
+                 for column, field in zip(columns, schema)],
+                schema=schema))
+
+    def add_commit(self, commit_stats_item):
+        self.commit_rows.append(commit_row(commit_stats_item))
+        if len(self.commit_rows) >= self.chunk_size:
+            self._write_chunk(
+                self.commit_writer, self.commit_schema, self.commit_rows)
+            self.commit_rows = []
+
+    def write_files(self, file_stats, commits):
+        file_writer = self._open('files', self.file_schema)
+        rows = []
+        for row in file_rows(file_stats, commits, self.show_deleted_files):
+            rows.append(row)
+            if len(rows) >= self.chunk_size:
+                self._write_chunk(file_writer, self.file_schema, rows)
+                rows = []
+        self._write_chunk(file_writer, self.file_schema, rows)
+        file_writer.close()
+
+    def close(self):
+        self._write_chunk(
+            self.commit_writer, self.commit_schema, self.commit_rows)
+        self.commit_writer.close()
+
+
+REPORT_FORMATS = ['xlsx', 'csv', 'parquet', 'arrow']
+
+
+def create_report(report_format, report_file, show_deleted_files=False,
+                  streaming_report=False):
+    '''Returns the report writer for the format from REPORT_FORMATS.
+    Parquet and Arrow need pyarrow, without it the gzipped CSV files
+    are written instead.
+    '''
+    if report_format not in REPORT_FORMATS:
+        raise ValueError("Unknown report format {}, expected one of {}".format(
+            report_format, ", ".join(REPORT_FORMATS)))
+    if report_format == 'xlsx':
+        return XlsxReport(report_file, show_deleted_files, streaming_report)
+    if report_format in ('parquet', 'arrow'):
+        if importlib.util.find_spec('pyarrow') is not None:
+            return ArrowReport(report_file, show_deleted_files, report_format)
+        print("pyarrow is not installed, writing CSV instead of {}".format(
+            report_format))
+    return CsvReport(report_file, show_deleted_files)
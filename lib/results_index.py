@@ -0,0 +1,258 @@
+'''
+Index of the analysis results in SQLite. It keeps the statistics of the
+commits, the directories and the files, so the questions about the
+history are answered without analyzing the repository again.
+'''
+
+import json
+import os
+import sqlite3
+
+from lib.tree_summary import TreeSummary
+from lib.indent_stats import process_indent_stats
+from lib.xlsx_report import complexity_value
+
+
+STATS_COLUMNS = (
+    "lines_code INTEGER, avg REAL, stddev REAL, max INTEGER, "
+    "complexity REAL, hist TEXT")
+SCHEMA = [
+    "CREATE TABLE walked_commits (id INTEGER PRIMARY KEY, "
+    "hexsha TEXT NOT NULL, date TEXT NOT NULL)",
+    "CREATE TABLE commits (id INTEGER PRIMARY KEY, hexsha TEXT NOT NULL, "
+    "date TEXT NOT NULL, " + STATS_COLUMNS + ")",
+    "CREATE TABLE directories (path TEXT NOT NULL, "
+    "commit_id INTEGER NOT NULL, files INTEGER NOT NULL, " + STATS_COLUMNS +
+    ", PRIMARY KEY (path, commit_id))",
+    "CREATE TABLE files (path TEXT PRIMARY KEY, commits INTEGER, "
+    "lines INTEGER, insertions INTEGER, deletions INTEGER, "
+    "deleted INTEGER, " + STATS_COLUMNS + ")",
+    "CREATE TABLE file_revisions (path TEXT NOT NULL, "
+    "revision INTEGER NOT NULL, commit_id INTEGER NOT NULL, " +
+    STATS_COLUMNS + ", PRIMARY KEY (path, revision))",
+]
+FILE_ORDERS = [
+    "commits", "lines", "insertions", "deletions", "lines_code",
+    "complexity"]
+
+
+def stats_values(stats):
+    '''Returns the values of STATS_COLUMNS for process_indent_stats'''
+    return (stats["cnt"], stats["avg"], stats["stddev"], stats["max"],
+            complexity_value(stats), json.dumps(list(stats["hist"])))
+
+
+def directory_path(path):
+    '''Returns the path of a directory as it is kept in the index, the
+    root directory is an empty string
+    '''
+    path = path.strip('/')
+    return '' if path == '.' else path
+
+
+def _join(directory, name):
+    return directory + '/' + name if directory else name
+
+
+class ResultsIndex:
+    '''Writes the results of one run into a new SQLite database.
+    For every analyzed commit the statistics of the directories are
+    saved too, but only for the directories that changed since the
+    previous analyzed commit. The unchanged ones share the TreeSummary
+    (see lib/tree_summary.py), so they are skipped without comparing
+    them. A deleted directory gets a row with no files.
+    '''
+
+    def __init__(self, file_name):
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        self.connection = sqlite3.connect(file_name)
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.previous = None
+
+    def add_walked_commit(self, commit_id, hexsha, date):
+        '''Saves a commit of the walked history, the revisions of the files
+        refer to them also when the commits are not analyzed because of
+        the sampling granularity
+        '''
+        self.connection.execute(
+            "INSERT INTO walked_commits VALUES (?, ?, ?)",
+            (commit_id, hexsha, date))
+
+    def add_commit(self, commit_id, hexsha, date, stats, tree_summary=None):
+        '''Saves the statistics of the commit, commit_id is its index in
+        the CommitTable. With the TreeSummary of the commit the changed
+        directories are saved too.
+        '''
+        self.connection.execute(
+            "INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (commit_id, hexsha, date) + stats_values(stats))
+        if tree_summary is not None:
+            self.add_directories(commit_id, tree_summary)
+
+    def add_directories(self, commit_id, tree_summary):
+        rows = []
+        stack = [('', tree_summary, self.previous)]
+        while stack:
+            path, summary, previous = stack.pop()
+            if summary is previous:
+                continue
+            rows.append((path, commit_id, summary.file_count) + stats_values(
+                process_indent_stats(summary.hist)))
+            previous_entries = previous.entries if previous else {}
+            for name, entry in summary.entries.items():
+                if isinstance(entry, TreeSummary):
+                    previous_entry = previous_entries.get(name)
+                    if not isinstance(previous_entry, TreeSummary):
+                        previous_entry = None
+                    stack.append((_join(path, name), entry, previous_entry))
+            for name, entry in previous_entries.items():
+                if isinstance(entry, TreeSummary) and not isinstance(
+                        summary.entries.get(name), TreeSummary):
+                    rows.extend(self._deleted(
+                        _join(path, name), entry, commit_id))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO directories "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.previous = tree_summary
+
+    @staticmethod
+    def _deleted(path, summary, commit_id):
+        empty = stats_values(process_indent_stats([]))
+        stack = [(path, summary)]
+        while stack:
+            path, summary = stack.pop()
+            yield (path, commit_id, 0) + empty
+            for name, entry in summary.entries.items():
+                if isinstance(entry, TreeSummary):
+                    stack.append((_join(path, name), entry))
+
+    def write_files(self, files, commits):
+        '''Saves the statistics per file and their kept revisions, the
+        revision 0 is the latest one
+        '''
+        file_rows = []
+        revision_rows = []
+        for file_data in files.values():
+            latest = (None,) * 6
+            for revision, file_revision in enumerate(file_data.revisions):
+                values = stats_values(file_revision.complexity.stats)
+                if revision == 0:
+                    latest = values
+                revision_rows.append(
+                    (file_data.name, revision, file_revision.commit) +
+                    values)
+            file_rows.append((
+                file_data.name, file_data.commits, file_data.lines,
+                file_data.insertions, file_data.deletions,
+                int(file_data.deleted)) + latest)
+        self.connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            file_rows)
+        self.connection.executemany(
+            "INSERT INTO file_revisions "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", revision_rows)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class ResultsQuery:
+    '''Answers the questions about the results saved by ResultsIndex.
+    Every method returns a list of dictionaries with the histograms as
+    lists, ready to be printed or sent as JSON.
+    '''
+
+    def __init__(self, file_name):
+        if not os.path.exists(file_name):
+            raise ValueError("The results index {} does not exist".format(
+                file_name))
+        self.connection = sqlite3.connect(
+            'file:{}?mode=ro'.format(file_name), uri=True,
+            check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+
+    def _rows(self, query, parameters=()):
+        rows = []
+        for row in self.connection.execute(query, parameters):
+            row = dict(row)
+            if row.get("hist") is not None:
+                row["hist"] = json.loads(row["hist"])
+            rows.append(row)
+        return rows
+
+    def commits(self, limit=None):
+        '''Returns the statistics of the analyzed commits from the oldest
+        one, with limit only the latest limit commits
+        '''
+        return self._rows(
+            "SELECT * FROM (SELECT * FROM commits ORDER BY id DESC LIMIT ?) "
+            "ORDER BY id", (-1 if limit is None else limit,))
+
+    def directory_history(self, path):
+        '''Returns the statistics of the directory for every analyzed
+        commit changing it, from the oldest one
+        '''
+        return self._rows(
+            "SELECT commits.hexsha AS commit_hexsha, commits.date, "
+            "directories.* FROM directories "
+            "JOIN commits ON commits.id = directories.commit_id "
+            "WHERE directories.path = ? ORDER BY directories.commit_id",
+            (directory_path(path),))
+
+    def directories(self, limit=20, parent=None):
+        '''Returns the directories with their latest statistics, the most
+        complex ones first. With parent only its direct subdirectories
+        are returned.
+        '''
+        query = (
+            "SELECT directories.* FROM directories JOIN ("
+            "SELECT path, MAX(commit_id) AS commit_id FROM directories "
+            "GROUP BY path) AS latest USING (path, commit_id) "
+            "WHERE files > 0")
+        parameters = []
+        if parent is not None:
+            parent = directory_path(parent)
+            prefix = parent + '/' if parent else ''
+            query += (" AND path != '' AND substr(path, 1, ?) = ? "
+                      "AND instr(substr(path, ?), '/') = 0")
+            parameters += [len(prefix), prefix, len(prefix) + 1]
+        query += " ORDER BY complexity DESC LIMIT ?"
+        return self._rows(query, parameters + [limit])
+
+    def top_files(self, by="commits", limit=20, directory=None,
+                  show_deleted_files=False):
+        '''Returns the files with the most commits, changed lines,
+        complexity or other value of FILE_ORDERS, within the directory
+        when it is given
+        '''
+        if by not in FILE_ORDERS:
+            raise ValueError("Unknown order {}, expected one of {}".format(
+                by, ", ".join(FILE_ORDERS)))
+        query = "SELECT * FROM files WHERE 1"
+        parameters = []
+        if not show_deleted_files:
+            query += " AND deleted = 0"
+        if directory:
+            directory = directory_path(directory)
+            if directory:
+                # The paths starting with "dir/" sort between "dir/" and
+                # "dir0", so the primary key index is used
+                query += " AND path >= ? AND path < ?"
+                parameters += [directory + '/', directory + '0']
+        query += " ORDER BY {} DESC, path LIMIT ?".format(by)
+        return self._rows(query, parameters + [limit])
+
+    def file_history(self, path):
+        '''Returns the kept revisions of the file from the latest one'''
+        return self._rows(
+            "SELECT walked_commits.hexsha AS commit_hexsha, "
+            "walked_commits.date, file_revisions.* FROM file_revisions "
+            "LEFT JOIN walked_commits "
+            "ON walked_commits.id = file_revisions.commit_id "
+            "WHERE path = ? ORDER BY revision", (path,))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,81 @@
+'''
+Local HTTP endpoint answering the queries of ResultsQuery with JSON
+'''
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from urllib.parse import parse_qs, urlparse
+
+from lib.results_index import ResultsQuery
+
+
+def _limit(parameters, default=20):
+    value = parameters.get("limit")
+    return default if value is None else int(value)
+
+
+ROUTES = {
+    "/commits": lambda query, parameters: query.commits(
+        _limit(parameters, None)),
+    "/directory": lambda query, parameters: query.directory_history(
+        parameters.get("path", '')),
+    "/directories": lambda query, parameters: query.directories(
+        _limit(parameters), parameters.get("parent")),
+    "/files": lambda query, parameters: query.top_files(
+        parameters.get("by", 'commits'), _limit(parameters),
+        parameters.get("directory")),
+    "/file": lambda query, parameters: query.file_history(
+        parameters["path"]),
+}
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    '''Answers GET requests like /files?by=complexity&limit=10, the
+    routes are in ROUTES. Every request opens the index read-only, so the
+    index may be written again by the next analysis meanwhile.
+    '''
+    index_file = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route = ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self.send_json(404, {
+                "error": "Unknown path {}".format(url.path),
+                "paths": sorted(ROUTES)})
+            return
+        parameters = {name: values[-1] for name, values in
+                      parse_qs(url.query).items()}
+        try:
+            query = ResultsQuery(self.index_file)
+        except ValueError as e:
+            self.send_json(503, {"error": str(e)})
+            return
+        try:
+            self.send_json(200, route(query, parameters))
+        except KeyError as e:
+            self.send_json(400, {"error": "Missing parameter {}".format(e)})
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        finally:
+            query.close()
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(index_file, host='127.0.0.1', port=8000):
+    '''Returns the HTTP server for the results index, port 0 picks a free
+    port. The server is started with serve_forever.
+    '''
+    handler = type(
+        'ResultsHandler', (ResultsHandler,), {"index_file": index_file})
+    return ThreadingHTTPServer((host, port), handler)
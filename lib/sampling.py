@@ -0,0 +1,44 @@
+'''
+Selection of the commits representing the history in the sampling mode
+'''
+
+import datetime
+
+
+GRANULARITIES = ['all', 'daily', 'weekly', 'every_n']
+
+
+def commit_bucket(timestamp, granularity):
+    '''Returns the key of the time bucket the commit belongs to:
+    the day or the ISO week (year, week number) of the local time
+    '''
+    date = datetime.datetime.fromtimestamp(timestamp).date()
+    if granularity == 'daily':
+        return date
+    return tuple(date.isocalendar())[:2]
+
+
+def sample_commits(commits, granularity, every_n=1):
+    '''Selects the commits to analyze.
+    commits is a list of tuples (hexsha, commit timestamp) of the first
+    parent line starting from the latest commit.
+    For daily and weekly granularity the latest commit of every day or
+    week is selected, for every_n every n-th commit starting from the
+    latest one. Returns a set of the selected hexshas, or None when all
+    the commits must be analyzed.
+    '''
+    if granularity not in GRANULARITIES:
+        raise ValueError("Unknown granularity {}, expected one of {}".format(
+            granularity, ", ".join(GRANULARITIES)))
+    if granularity == 'all':
+        return None
+    if granularity == 'every_n':
+        return set(hexsha for hexsha, _ in commits[::max(1, every_n)])
+    selected = set()
+    buckets = set()
+    for hexsha, timestamp in commits:
+        bucket = commit_bucket(timestamp, granularity)
+        if bucket not in buckets:
+            selected.add(hexsha)
+            buckets.add(bucket)
+    return selected
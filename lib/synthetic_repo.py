@@ -0,0 +1,196 @@
+'''
+Generator of synthetic git repositories for the benchmarks. The history is
+written by git fast-import, so even big repositories are created quickly
+and without a working tree.
+'''
+
+import random
+import subprocess
+
+
+EXTENSIONS = ['.py', '.c', '.sh', '.txt']
+START_TIMESTAMP = 1500000000
+COMMIT_INTERVAL = 3600
+
+
+def generate_lines(rnd, count, max_depth=6):
+    '''Returns count lines of code with the indentation changing like in
+    nested blocks
+    '''
+    lines = []
+    depth = 0
+    for _ in range(count):
+        depth = min(max_depth, max(0, depth + rnd.choice([-1, 0, 0, 1])))
+        if rnd.random() < 0.1:
+            lines.append('')
+        else:
+            lines.append('    ' * depth + 'statement_{}()'.format(
+                rnd.randrange(1000)))
+    return lines
+
+
+class SyntheticRepo:
+    '''Writes the fast-import stream of a history with the given numbers
+    of commits and files. Every commit changes changes_per_commit files,
+    replacing some of their lines, a part of the changes are renames,
+    additions or deletions of files. With merge_every set, every n-th
+    commit of the main line is a merge of a side branch of branch_length
+    commits. The result only depends on the seed.
+    '''
+
+    def __init__(self, commits=100, files=50, file_lines=100,
+                 changes_per_commit=3, rename_rate=0.05, delete_rate=0.02,
+                 merge_every=0, branch_length=2, seed=0):
+        self.commits = commits
+        self.file_count = files
+        self.file_lines = file_lines
+        self.changes_per_commit = changes_per_commit
+        self.rename_rate = rename_rate
+        self.delete_rate = delete_rate
+        self.merge_every = merge_every
+        self.branch_length = branch_length
+        self.rnd = random.Random(seed)
+        self.files = {}
+        self.marks = {}
+        self.next_mark = 1
+        self.next_file = 0
+        self.commit_no = 0
+        self.stream = None
+
+    def create(self, path):
+        '''Creates the repository in the directory path'''
+        subprocess.run(['git', 'init', '-q', path], check=True)
+        process = subprocess.Popen(
+            ['git', '-C', path, 'fast-import', '--quiet'],
+            stdin=subprocess.PIPE)
+        self.stream = process.stdin
+        try:
+            self.write_history()
+        finally:
+            self.stream.close()
+        if process.wait():
+            raise subprocess.CalledProcessError(
+                process.returncode, 'git fast-import')
+        subprocess.run(
+            ['git', '-C', path, 'symbolic-ref', 'HEAD', 'refs/heads/master'],
+            check=True)
+
+    def write_history(self):
+        tip = self.write_commit(
+            'refs/heads/master', None, None,
+            [self.add_file() for _ in range(self.file_count)])
+        while self.commit_no < self.commits:
+            if (self.merge_every and
+                    self.commit_no % self.merge_every == 0 and
+                    self.commit_no + self.branch_length < self.commits):
+                tip = self.write_branch(tip)
+            else:
+                tip = self.write_commit(
+                    'refs/heads/master', tip, None, self.random_changes())
+
+    def write_branch(self, tip):
+        '''Writes a side branch starting at tip and merges it back, the
+        merge brings the final versions of the files changed in the branch
+        '''
+        branch_tip = tip
+        changed = set()
+        for _ in range(self.branch_length):
+            paths = self.rnd.sample(
+                sorted(self.files), min(len(self.files),
+                                        self.changes_per_commit))
+            changed.update(paths)
+            branch_tip = self.write_commit(
+                'refs/heads/side', branch_tip, None,
+                [self.modify_file(path) for path in paths])
+        return self.write_commit(
+            'refs/heads/master', tip, branch_tip,
+            ['M 100644 :{} {}'.format(self.marks[path], path)
+             for path in sorted(changed)])
+
+    def random_changes(self):
+        changes = []
+        for _ in range(self.changes_per_commit):
+            value = self.rnd.random()
+            if value < self.rename_rate and self.files:
+                changes.append(self.rename_file())
+            elif (value < self.rename_rate + self.delete_rate and
+                    len(self.files) > 1):
+                changes.append(self.delete_file())
+            elif value > 0.95 or not self.files:
+                changes.append(self.add_file())
+            else:
+                changes.append(self.modify_file(
+                    self.rnd.choice(sorted(self.files))))
+        return changes
+
+    def add_file(self):
+        path = 'src/dir{}/file{}{}'.format(
+            self.next_file % 10, self.next_file,
+            self.rnd.choice(EXTENSIONS))
+        self.next_file += 1
+        self.files[path] = generate_lines(self.rnd, self.file_lines)
+        return self.write_blob(path)
+
+    def modify_file(self, path):
+        lines = self.files[path]
+        start = self.rnd.randrange(len(lines) + 1)
+        end = min(len(lines), start + self.rnd.randrange(10))
+        lines[start:end] = generate_lines(
+            self.rnd, self.rnd.randrange(1, 10))
+        return self.write_blob(path)
+
+    def rename_file(self):
+        old_path = self.rnd.choice(sorted(self.files))
+        base, extension = old_path.rsplit('.', 1)
+        new_path = '{}_r{}.{}'.format(base, self.commit_no, extension)
+        self.files[new_path] = self.files.pop(old_path)
+        self.marks[new_path] = self.marks.pop(old_path)
+        return 'R {} {}'.format(old_path, new_path)
+
+    def delete_file(self):
+        path = self.rnd.choice(sorted(self.files))
+        del self.files[path]
+        del self.marks[path]
+        return 'D {}'.format(path)
+
+    def new_mark(self):
+        self.next_mark += 1
+        return self.next_mark - 1
+
+    def write_blob(self, path):
+        '''Writes the current content of the file, returns the change'''
+        data = ('\n'.join(self.files[path]) + '\n').encode()
+        mark = self.new_mark()
+        self.marks[path] = mark
+        self.stream.write(b'blob\nmark :%d\ndata %d\n' % (mark, len(data)))
+        self.stream.write(data + b'\n')
+        return 'M 100644 :{} {}'.format(mark, path)
+
+    def write_commit(self, ref, parent, merged, changes):
+        '''Writes a commit with the parents given by their marks and
+        returns its mark
+        '''
+        self.commit_no += 1
+        mark = self.new_mark()
+        message = 'commit {}'.format(self.commit_no).encode()
+        lines = [
+            'commit {}'.format(ref),
+            'mark :{}'.format(mark),
+            'committer Benchmark <benchmark@example.com> {} +0000'.format(
+                START_TIMESTAMP + self.commit_no * COMMIT_INTERVAL),
+            'data {}'.format(len(message))]
+        self.stream.write('\n'.join(lines).encode() + b'\n' + message + b'\n')
+        lines = []
+        if parent:
+            lines.append('from :{}'.format(parent))
+        if merged:
+            lines.append('merge :{}'.format(merged))
+        self.stream.write('\n'.join(lines + changes + ['']).encode())
+        return mark
+
+
+def create_synthetic_repo(path, **parameters):
+    '''Creates a synthetic repository in the directory path, see
+    SyntheticRepo for the parameters
+    '''
+    SyntheticRepo(**parameters).create(path)
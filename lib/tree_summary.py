@@ -0,0 +1,64 @@
+'''
+Aggregated complexity of the git trees, memoized by the tree SHA
+'''
+
+from collections import OrderedDict
+
+
+def tree_entries(data):
+    '''Yields tuples (binary SHA, mode, name) for the entries of the raw
+    data of a tree object, every entry is the octal mode, a space, the
+    name, a NUL byte and the 20 bytes of the SHA
+    '''
+    position = 0
+    end = len(data)
+    while position < end:
+        space = data.index(b' ', position)
+        null = data.index(b'\0', space)
+        mode = int(data[position:space], 8)
+        name = data[space + 1:null].decode('utf-8', 'surrogateescape')
+        position = null + 21
+        yield data[null + 1:position], mode, name
+
+
+class TreeSummary:
+    '''Complexity of the analyzed files of a tree: the joined indentation
+    histogram, the number of the files and the entries of the tree by
+    name, a BlobComplexity for a file and a TreeSummary for a directory.
+    The summaries of the unchanged directories are shared between the
+    commits.
+    '''
+    __slots__ = ('hist', 'file_count', 'entries')
+
+    def __init__(self, hist, file_count, entries):
+        self.hist = hist
+        self.file_count = file_count
+        self.entries = entries
+
+
+class TreeSummaryCache:
+    '''LRU cache of at most max_size TreeSummary objects. The key is the
+    binary SHA and the path of the tree, the ignored files depend on the
+    path, so the same tree in another directory may have another summary.
+    '''
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.summaries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hexsha, path):
+        summary = self.summaries.get((hexsha, path))
+        if summary is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.summaries.move_to_end((hexsha, path))
+        return summary
+
+    def put(self, hexsha, path, summary):
+        self.summaries[(hexsha, path)] = summary
+        self.summaries.move_to_end((hexsha, path))
+        while len(self.summaries) > self.max_size:
+            self.summaries.popitem(last=False)
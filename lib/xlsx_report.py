@@ -0,0 +1,144 @@
+'''
+Excel report with the statistics per commit and per file
+'''
+
+import os.path
+from os import remove
+
+
+# The number of the latest revisions of every file shown in the report
+REPORT_REVISIONS = 5
+
+
+def complexity_value(stats):
+    '''Combines the indentation statistics into one complexity number'''
+    return (
+        (stats["max"] if stats["max"] else 0.0) +
+        (stats["stddev"] if stats["stddev"] else 0.0) * 10.0 +
+        (stats["avg"] if stats["avg"] else 0.0) * 5.0)
+
+
+class XlsxReport:
+    '''Writes the Excel report while the history is being analyzed.
+    The rows of the commits sheet are written by add_commit as soon as
+    every commit is processed, the files sheet is written by write_files
+    at the end. With constant_memory the rows are flushed to the disk
+    right away instead of being kept in memory until close.
+    '''
+
+    def __init__(self, xlsx_file, show_deleted_files=False,
+                 constant_memory=False):
+        if os.path.isfile(xlsx_file):
+            remove(xlsx_file)
+        import xlsxwriter
+        self.xlsx_file = xlsx_file
+        self.show_deleted_files = show_deleted_files
+        self.workbook = xlsxwriter.Workbook(
+            xlsx_file, {"constant_memory": constant_memory})
+        self.header_format = self.workbook.add_format({"bold": True})
+        self.indent_format = self.workbook.add_format(
+            {"num_format": "#,##0.000"})
+
+        self.commit_stat_sheet = self.workbook.add_worksheet("commits")
+        self.file_sheet = self.workbook.add_worksheet("files")
+        header_format = self.header_format
+        commit_stat_sheet = self.commit_stat_sheet
+        commit_stat_sheet.set_column(0, 0, width=50)
+        commit_stat_sheet.set_column(1, 1, width=20)
+        commit_stat_sheet.set_column(2, 6, width=12)
+        commit_stat_sheet.write(0, 0, "Commit", header_format)
+        commit_stat_sheet.write(0, 1, "Date", header_format)
+        commit_stat_sheet.write(0, 2, "Code lines", header_format)
+        commit_stat_sheet.write(0, 3, "Avg indent", header_format)
+        commit_stat_sheet.write(0, 4, "Stddev indent", header_format)
+        commit_stat_sheet.write(0, 5, "Max indent", header_format)
+        commit_stat_sheet.write(0, 6, "Complexity", header_format)
+        self.commit_row = 1
+
+    def add_commit(self, commit_stats_item):
+        '''Writes the row for one commit, expects a dictionary with the
+        keys "commit", "date" and "stats" (see process_indent_stats)
+        '''
+        row = self.commit_row
+        row_str = str(row + 1)
+        stats = commit_stats_item["stats"]
+        commit_stat_sheet = self.commit_stat_sheet
+        indent_format = self.indent_format
+        commit_stat_sheet.write(row, 0, commit_stats_item["commit"])
+        commit_stat_sheet.write(row, 1, commit_stats_item["date"])
+        commit_stat_sheet.write(row, 2, stats["cnt"])
+        commit_stat_sheet.write(row, 3, stats["avg"], indent_format)
+        commit_stat_sheet.write(row, 4, stats["stddev"], indent_format)
+        commit_stat_sheet.write(row, 5, stats["max"], indent_format)
+        commit_stat_sheet.write_formula(
+            row, 6, '=F' + row_str + '+E' + row_str + '*10+D' + row_str + '*5',
+            indent_format, value=complexity_value(stats))
+        self.commit_row += 1
+
+    def write_files(self, file_stats, commits=None):
+        '''Writes the files sheet. Expects a dictionary of FileStats
+        (see lib/records.py), the revisions go from the latest to the
+        oldest one. The commits of the revisions are not shown, so the
+        CommitTable is not needed.
+        '''
+        header_format = self.header_format
+        indent_format = self.indent_format
+        show_deleted_files = self.show_deleted_files
+        file_sheet = self.file_sheet
+        file_sheet.set_column(0, 0, width=50)
+        file_sheet.set_column(1, 16, width=10)
+        file_sheet.write(0, 0, "File", header_format)
+        file_sheet.write(0, 1, "Revisions", header_format)
+        file_sheet.write(0, 2, "Lines code last 5 revisions", header_format)
+        file_sheet.write(
+            0, 7, "Complexity in last 5 revisions", header_format)
+        file_sheet.write(0, 12, "Avg indent", header_format)
+        file_sheet.write(0, 13, "Stddev indent", header_format)
+        file_sheet.write(0, 14, "Max indent", header_format)
+        if show_deleted_files:
+            file_sheet.write(0, 15, "Deleted", header_format)
+        row = 1
+        for file in sorted(
+                [(file_stats[file].name, file) for file in file_stats]):
+            file_data = file_stats[file[1]]
+            if file_data.deleted and not show_deleted_files:
+                continue
+            file_sheet.write(row, 0, file_data.name)
+            file_sheet.write(row, 1, file_data.commits)
+            if len(file_data.revisions):
+                stats = file_data.revisions[0].complexity.stats
+                file_sheet.write(row, 12, stats["avg"], indent_format)
+                file_sheet.write(row, 13, stats["stddev"], indent_format)
+                file_sheet.write(row, 14, stats["max"], indent_format)
+                for revision in range(0, REPORT_REVISIONS):
+                    if len(file_data.revisions) <= revision:
+                        break
+                    complexity = file_data.revisions[revision].complexity
+                    file_sheet.write(row, 7 + revision, round(
+                        complexity_value(complexity.stats), 3))
+                    file_sheet.write(
+                        row, 2 + revision, complexity.lines_code)
+            if show_deleted_files and file_data.deleted:
+                file_sheet.write(row, 15, True)
+            row += 1
+
+    def close(self):
+        last_row_str = str(self.commit_row)
+        chart = self.workbook.add_chart({"type": "line"})
+        chart.add_series(
+            {"name": "Lines of code", "values": "=C2:C" + last_row_str})
+        chart.add_series({
+            "name": "Complexity", "values": "=G2:G" + last_row_str,
+            "y2_axis": True})
+        chart.set_y2_axis({"name": "Lines of code"})
+        chart.set_y_axis({"name": "Complexity"})
+        self.commit_stat_sheet.insert_chart(
+            'A5', chart,
+            options={'x_offset': 0, 'y_offset': 0, 'x_scale': 2,
+                     'y_scale': 2})
+        try:
+            self.workbook.close()
+        except PermissionError:
+            print(
+                "PermissionError on writing the file {}. Already opened?"
+                .format(self.xlsx_file))
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+
+import argparse
+import json
+import sys
+from lib.results_index import FILE_ORDERS, ResultsQuery
+from lib.results_server import create_server
+
+
+INDEX_FILE = 'git_analysis.index.sqlite'
+
+COLUMNS = {
+    "commits": ["date", "hexsha", "lines_code", "avg", "max", "complexity"],
+    "directory": [
+        "date", "commit_hexsha", "files", "lines_code", "avg", "max",
+        "complexity"],
+    "directories": ["path", "files", "lines_code", "avg", "max",
+                    "complexity"],
+    "files": ["path", "commits", "lines", "insertions", "deletions",
+              "lines_code", "complexity"],
+    "file": ["date", "commit_hexsha", "lines_code", "avg", "max",
+             "complexity"],
+}
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return "{:.2f}".format(value)
+    return '' if value is None else str(value)
+
+
+def print_rows(rows, columns):
+    '''Prints the rows as a table with the columns'''
+    table = [columns] + [[format_value(row[column]) for column in columns]
+                         for row in rows]
+    widths = [max(len(line[i]) for line in table)
+              for i in range(len(columns))]
+    for line in table:
+        print("  ".join(
+            value.ljust(width) for value, width in zip(line, widths))
+            .rstrip())
+
+
+def run_query(query, arguments):
+    if arguments.command == 'commits':
+        return query.commits(arguments.limit)
+    if arguments.command == 'directory':
+        return query.directory_history(arguments.path)
+    if arguments.command == 'directories':
+        return query.directories(arguments.limit, arguments.parent)
+    if arguments.command == 'files':
+        return query.top_files(
+            arguments.by, arguments.limit, arguments.directory,
+            arguments.deleted)
+    return query.file_history(arguments.path)
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Queries the results index written by git_analysis.py "
+        "with the results_index setting")
+    parser.add_argument(
+        '--index', default=INDEX_FILE,
+        help="the results index, {} by default".format(INDEX_FILE))
+    parser.add_argument(
+        '--json', action='store_true', help="print the rows as JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commits = commands.add_parser(
+        'commits', help="the statistics of the analyzed commits")
+    commits.add_argument(
+        '--limit', type=int, help="only the latest LIMIT commits")
+    directory = commands.add_parser(
+        'directory', help="the complexity of a directory over time")
+    directory.add_argument(
+        'path', nargs='?', default='', help="the directory, the root one "
+        "by default")
+    directories = commands.add_parser(
+        'directories', help="the most complex directories now")
+    directories.add_argument('--limit', type=int, default=20)
+    directories.add_argument(
+        '--parent', help="only the subdirectories of the directory")
+    files = commands.add_parser('files', help="the top files")
+    files.add_argument('--by', choices=FILE_ORDERS, default='commits')
+    files.add_argument('--limit', type=int, default=20)
+    files.add_argument('--directory', help="only the files in the directory")
+    files.add_argument(
+        '--deleted', action='store_true', help="include the deleted files")
+    file = commands.add_parser(
+        'file', help="the complexity of the kept revisions of a file")
+    file.add_argument('path')
+    serve = commands.add_parser(
+        'serve', help="answer the queries over HTTP with JSON")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments(sys.argv[1:])
+    if arguments.command == 'serve':
+        server = create_server(arguments.index, arguments.host, arguments.port)
+        print("Serving {} on http://{}:{}/".format(
+            arguments.index, *server.server_address[:2]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+        exit(0)
+    try:
+        query = ResultsQuery(arguments.index)
+    except ValueError as e:
+        print(str(e))
+        exit(1)
+    rows = run_query(query, arguments)
+    query.close()
+    if arguments.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_rows(rows, COLUMNS[arguments.command])
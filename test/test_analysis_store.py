@@ -0,0 +1,64 @@
+'''
+Unit tests for lib/analysis_store.py
+'''
+
+import unittest
+
+
+class AnalysisStore(unittest.TestCase):
+
+    def setUp(self):
+        from lib.analysis_store import AnalysisStore
+        self.store = AnalysisStore(':memory:')
+        self.calls = 0
+
+    def tearDown(self):
+        self.store.close()
+
+    def compute(self):
+        self.calls += 1
+        return {"cnt": 3, "avg": None, "hist": [1, 2]}
+
+    def test_missing_blob(self):
+        '''Returns None for a blob that is not stored'''
+        self.assertIsNone(self.store.get_blob('abc'))
+
+    def test_blob_round_trip(self):
+        '''Returns the stored blob result'''
+        self.store.put_blob('abc', self.compute())
+        self.assertEqual(self.store.get_blob('abc'), self.compute())
+
+    def test_lookup_commit_computes_once(self):
+        '''Calls compute only when the commit is not stored yet'''
+        first = self.store.lookup_commit('c1', 'stats', 'f', self.compute)
+        second = self.store.lookup_commit('c1', 'stats', 'f', self.compute)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+
+    def test_commit_kind_and_fingerprint(self):
+        '''Results of another kind or fingerprint are not reused'''
+        self.store.lookup_commit('c1', 'stats', 'f', self.compute)
+        self.store.lookup_commit('c1', 'files', 'f', self.compute)
+        self.store.lookup_commit('c1', 'stats', 'g', self.compute)
+        self.assertEqual(self.calls, 3)
+
+
+class ComplexityCacheWithStore(unittest.TestCase):
+
+    def setUp(self):
+        from lib.analysis_store import AnalysisStore
+        from lib.complexity_cache import ComplexityCache
+        self.store = AnalysisStore(':memory:')
+        self.make_cache = lambda: ComplexityCache(['a'], True, self.store)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_reuses_stored_results(self):
+        '''A new cache takes the results of the previous run from store'''
+        cache = self.make_cache()
+        cache.lookup(cache.key('abc', 'text/plain'), lambda: {"cnt": 1})
+        cache = self.make_cache()
+        result = cache.lookup(
+            cache.key('abc', 'text/plain'), lambda: self.fail('computed'))
+        self.assertEqual(result, {"cnt": 1})
@@ -0,0 +1,224 @@
+'''
+Unit tests for lib/analyzer.py
+'''
+
+import datetime
+import os
+import tempfile
+import unittest
+
+
+class Config(unittest.TestCase):
+
+    def test_from_dict(self):
+        '''Takes the relative paths relative to the base directory'''
+        from lib.analyzer import Config
+        config = Config.from_dict({
+            "path": 'repo', "report": 'report.xlsx',
+            "ignored_files": ['^vendor'], "store": 'store.sqlite',
+            "since": '2020-01-02', "workers": 2,
+            "results_index": 'index.sqlite'}, 'base')
+        self.assertEqual(config.path, os.path.join('base', 'repo'))
+        self.assertEqual(config.report, os.path.join('base', 'report.xlsx'))
+        self.assertEqual(config.store, os.path.join('base', 'store.sqlite'))
+        self.assertEqual(
+            config.results_index, os.path.join('base', 'index.sqlite'))
+        self.assertEqual(config.since, datetime.datetime(2020, 1, 2))
+        self.assertEqual(config.workers, 2)
+        self.assertEqual(config.granularity, 'all')
+        self.assertIsNone(config.metrics_log)
+
+    def test_missing_parameter(self):
+        '''Raises ValueError without a required parameter'''
+        from lib.analyzer import Config
+        with self.assertRaises(ValueError):
+            Config.from_dict({"path": 'repo', "report": 'report.xlsx'})
+
+    def test_unknown_setting(self):
+        '''Raises ValueError for an unknown setting'''
+        from lib.analyzer import Config
+        with self.assertRaises(ValueError):
+            Config('repo', 'report.xlsx', [], worker=2)
+
+    def test_unknown_granularity(self):
+        from lib.analyzer import Config
+        with self.assertRaises(ValueError):
+            Config('repo', 'report.xlsx', [], granularity='hour')
+
+
+class Analyzer(unittest.TestCase):
+
+    def setUp(self):
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(
+            self.path, commits=20, files=8, file_lines=20,
+            rename_rate=0.2, delete_rate=0.1, merge_every=5)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def config(self, **settings):
+        from lib.analyzer import Config
+        return Config(
+            self.path, os.path.join(self.tmp_dir.name, 'report.csv'),
+            ['\\.txt$'], report_format='csv', **settings)
+
+    def run_analyzer(self, **settings):
+        from lib.analyzer import Analyzer
+        return Analyzer(self.config(**settings)).run()
+
+    def test_run(self):
+        '''Analyzes all the commits and writes the report'''
+        files, commits, summary = self.run_analyzer()
+        self.assertEqual(len(commits), 20)
+        self.assertEqual(summary["commits"], 20)
+        self.assertFalse(any(name.endswith('.txt') for name in files))
+        self.assertGreater(summary["lines_code"], 0)
+        self.assertGreater(summary["metrics"]["counters"]["blobs"], 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmp_dir.name, 'report.commits.csv.gz')))
+
+    def test_tree_summary(self):
+        '''The summary of a tree has all the files that are not ignored,
+        the unchanged directories are taken from the cache
+        '''
+        import subprocess
+        from git import Repo
+        from lib.analyzer import Analyzer
+        from lib.blob_reader import CatFileReader
+        from lib.complexity_cache import ComplexityCache
+        from lib.records import BlobComplexity
+        from lib.tree_summary import TreeSummary
+        analyzer = Analyzer(self.config())
+        analyzer.repo = Repo(self.path)
+        analyzer.complexity_cache = ComplexityCache(
+            [], True, record_type=BlobComplexity)
+        analyzer.reader = CatFileReader(self.path)
+        try:
+            commits = list(analyzer.repo.iter_commits('HEAD', max_count=2))
+            analyzer.collect_complexity_stats_from_file_tree(commits[1].tree)
+            misses = analyzer.tree_summaries.misses
+            summary = analyzer.collect_complexity_stats_from_file_tree(
+                commits[0].tree)
+        finally:
+            analyzer.close()
+        files = subprocess.run(
+            ['git', '-C', self.path, 'ls-tree', '-r', '--name-only', 'HEAD'],
+            stdout=subprocess.PIPE, check=True).stdout.decode().split()
+        summary_files = []
+        stack = [('', summary)]
+        while stack:
+            prefix, tree_summary = stack.pop()
+            for name, entry in tree_summary.entries.items():
+                if isinstance(entry, TreeSummary):
+                    stack.append((prefix + name + '/', entry))
+                else:
+                    summary_files.append(prefix + name)
+        self.assertEqual(
+            sorted(summary_files),
+            sorted(path for path in files if not path.endswith('.txt')))
+        self.assertEqual(summary.file_count, len(summary_files))
+        self.assertGreater(analyzer.tree_summaries.hits, 0)
+        self.assertLess(analyzer.tree_summaries.misses - misses, misses)
+
+    def test_file_revisions(self):
+        '''Analyzes only the latest revisions of every file'''
+        files, _, summary = self.run_analyzer(
+            granularity='every_n', every_n=100, file_revisions=1)
+        _, _, all_revisions = self.run_analyzer(
+            granularity='every_n', every_n=100, file_revisions=None)
+        for file_stats in files.values():
+            self.assertLessEqual(len(file_stats.revisions), 1)
+            for revision in file_stats.revisions:
+                self.assertIsNotNone(revision.complexity)
+                self.assertIsNone(revision.blob)
+        self.assertLess(
+            summary["metrics"]["counters"]["blobs"],
+            all_revisions["metrics"]["counters"]["blobs"])
+
+    def test_commit_selection(self):
+        '''Walks the commits counted by git rev-list for every selection
+        of the history, the merges with paths included
+        '''
+        import subprocess
+        from lib.analyzer import Analyzer
+        until = '2017-07-14 12:00:00'
+        cases = [
+            ({}, ['HEAD']),
+            ({"first_parent": True}, ['--first-parent', 'HEAD']),
+            ({"until": until}, ['--until=2017-07-14T12:00:00', 'HEAD']),
+            ({"since": until}, ['--since=2017-07-14T12:00:00', 'HEAD']),
+            ({"rev_range": 'HEAD~5..HEAD'}, ['HEAD~5..HEAD']),
+            ({"rev_range": 'side'}, ['side']),
+            ({"paths": ['src/dir1']}, ['HEAD', '--', 'src/dir1']),
+            ({"paths": ['src/dir1', 'src/dir2'], "first_parent": True},
+             ['--first-parent', 'HEAD', '--', 'src/dir1', 'src/dir2']),
+            ({"paths": ['src'], "until": until, "rev_range": 'HEAD~2'},
+             ['--until=2017-07-14T12:00:00', 'HEAD~2', '--', 'src']),
+        ]
+        for settings, arguments in cases:
+            with self.subTest(settings=settings):
+                expected = subprocess.run(
+                    ['git', '-C', self.path, 'rev-list', '--reverse'] +
+                    arguments, stdout=subprocess.PIPE,
+                    check=True).stdout.decode().split()
+                self.assertTrue(expected)
+                analyzer = Analyzer(self.config(**settings))
+                _, commits, summary = analyzer.run()
+                self.assertEqual(
+                    [commits.hexsha(index) for index in range(len(commits))],
+                    expected)
+                self.assertEqual(analyzer.commit_count, len(expected))
+                self.assertEqual(summary["commits"], len(expected))
+
+    def test_paths_scope(self):
+        '''With paths the complexity of the commits and the count of the
+        job cover only the files within the paths
+        '''
+        import subprocess
+        from lib.job_size import count_job
+        tip_files = [
+            path for path in subprocess.run(
+                ['git', '-C', self.path, 'ls-tree', '-r', '--name-only',
+                 'HEAD', '--', 'src/dir1'],
+                stdout=subprocess.PIPE, check=True).stdout.decode().split()
+            if not path.endswith('.txt')]
+        self.assertTrue(tip_files)
+        _, _, whole = self.run_analyzer()
+        for incremental in (False, True):
+            with self.subTest(incremental=incremental):
+                files, _, summary = self.run_analyzer(
+                    paths=['src/dir1'], incremental=incremental)
+                self.assertEqual(
+                    sorted(name for name, file_stats in files.items()
+                           if not file_stats.deleted), sorted(tip_files))
+                self.assertEqual(summary["files"], len(tip_files))
+                self.assertEqual(summary["lines_code"], sum(
+                    files[name].revisions[0].complexity.stats["cnt"]
+                    for name in tip_files))
+                self.assertLess(summary["lines_code"], whole["lines_code"])
+        job = count_job(self.config(paths=['src/dir1']))
+        self.assertEqual(job["files"], len(tip_files))
+
+    def test_incremental(self):
+        '''The incremental analysis gives the same statistics'''
+        _, _, summary = self.run_analyzer()
+        _, _, incremental = self.run_analyzer(incremental=True)
+        for name in ("commits", "files", "lines_code", "avg", "max"):
+            self.assertEqual(summary[name], incremental[name])
+
+    def test_invalid_repository(self):
+        from lib.analyzer import AnalysisError, Analyzer, Config
+        config = Config(
+            os.path.join(self.tmp_dir.name, 'missing'),
+            os.path.join(self.tmp_dir.name, 'report.csv'), [],
+            report_format='csv')
+        with self.assertRaises(AnalysisError):
+            Analyzer(config).run()
+
+    def test_invalid_rev_range(self):
+        from lib.analyzer import AnalysisError
+        with self.assertRaises(AnalysisError):
+            self.run_analyzer(rev_range='missing-branch')
@@ -0,0 +1,84 @@
+'''
+Unit tests for lib/blob_engine.py
+'''
+
+import subprocess
+import tempfile
+import unittest
+
+
+class BlobEngine(unittest.TestCase):
+
+    def setUp(self):
+        from lib.blob_engine import BlobEngine
+        from lib.complexity import analyze_complexity_data
+        self.analyze_complexity_data = analyze_complexity_data
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        subprocess.run(
+            ['git', 'init', '-q', self.tmp_dir.name], check=True)
+        self.contents = [
+            b'a\n    b\n    c\n', b'"""Doc"""\nx = 1\n', b'',
+            b'{\n\tif (a) {\n\t\tb();\n\t}\n}\n']
+        self.jobs = [
+            (self.hash_object(data), language)
+            for data in self.contents for language in (None, 'python')]
+        self.engine = BlobEngine(self.tmp_dir.name, 2, True)
+
+    def tearDown(self):
+        self.engine.close()
+        self.tmp_dir.cleanup()
+
+    def hash_object(self, data):
+        return subprocess.run(
+            ['git', '-C', self.tmp_dir.name, 'hash-object', '-w', '--stdin'],
+            input=data, stdout=subprocess.PIPE,
+            check=True).stdout.decode().strip()
+
+    def test_same_as_serial(self):
+        '''Returns the same results as the serial analysis in job order'''
+        expected_result = [
+            self.analyze_complexity_data(data, language, True)
+            for data in self.contents for language in (None, 'python')]
+        result = self.engine.analyze(self.jobs)
+        self.assertEqual(result, expected_result)
+
+    def test_analyze_blob_jobs(self):
+        '''Analyzes the blobs in the current process'''
+        from lib.blob_engine import analyze_blob_jobs
+        from lib.blob_reader import CatFileReader
+        reader = CatFileReader(self.tmp_dir.name)
+        result = analyze_blob_jobs(reader, self.jobs, True)
+        reader.close()
+        self.assertEqual(result, self.engine.analyze(self.jobs))
+
+    def test_empty_batch(self):
+        '''Returns nothing for an empty batch'''
+        self.assertEqual(self.engine.analyze([]), [])
+
+    def test_timings(self):
+        '''Returns the size and the timings of every job'''
+        timings = []
+        self.engine.analyze(self.jobs, timings)
+        self.assertEqual(
+            [size for size, _, _ in timings],
+            [len(data) for data in self.contents for _ in (None, 'python')])
+        self.assertTrue(all(
+            read >= 0 and analyze >= 0 for _, read, analyze in timings))
+
+    def test_large_blobs(self):
+        '''Analyzes the large blobs in the separate pool, skips the binary
+        ones and keeps the job order
+        '''
+        from lib.blob_engine import BlobEngine
+        from lib.blob_guard import BlobGuard, skipped_result
+        jobs = self.jobs + [(self.hash_object(b'x\0y\n'), None)]
+        sizes = [len(data) for data in self.contents
+                 for _ in (None, 'python')] + [4]
+        engine = BlobEngine(
+            self.tmp_dir.name, 2, True, guard=BlobGuard(large_size=10))
+        try:
+            result = engine.analyze(jobs, sizes=sizes)
+        finally:
+            engine.close()
+        self.assertEqual(result[:-1], self.engine.analyze(self.jobs))
+        self.assertEqual(result[-1], skipped_result())
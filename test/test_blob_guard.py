@@ -0,0 +1,95 @@
+'''
+Unit tests for lib/blob_guard.py
+'''
+
+import random
+import unittest
+
+
+class BlobGuard(unittest.TestCase):
+
+    def setUp(self):
+        from lib.blob_guard import BlobGuard
+        self.guard = BlobGuard(max_size=100, sample_size=10, large_size=50)
+
+    def test_entropy(self):
+        from lib.blob_guard import entropy
+        self.assertEqual(entropy(b''), 0.0)
+        self.assertEqual(entropy(b'aaaa'), 0.0)
+        self.assertEqual(entropy(b'abab'), 1.0)
+
+    def test_sizes(self):
+        self.assertTrue(self.guard.skip_size(101))
+        self.assertFalse(self.guard.skip_size(100))
+        self.assertTrue(self.guard.is_large(51))
+        self.assertFalse(self.guard.is_large(50))
+
+    def test_no_limits(self):
+        from lib.blob_guard import BlobGuard
+        guard = BlobGuard()
+        self.assertFalse(guard.skip_size(1 << 40))
+        self.assertFalse(guard.is_large(1 << 40))
+        self.assertEqual(guard.prepare(b'a\n' * 1000), b'a\n' * 1000)
+
+    def test_binary(self):
+        '''Detects the NUL bytes, the random data and the minified code'''
+        rnd = random.Random(0)
+        self.assertTrue(self.guard.is_binary(b'abc\0def'))
+        self.assertTrue(self.guard.is_binary(
+            bytes(rnd.randrange(256) for _ in range(4096))))
+        self.assertTrue(self.guard.is_binary(b'var a=1;' * 2000))
+        self.assertFalse(self.guard.is_binary(
+            'def f():\n    return "é"\n'.encode() * 1000))
+
+    def test_prepare(self):
+        '''Skips the binary data and samples the whole lines'''
+        self.assertIsNone(self.guard.prepare(b'\0\1\2'))
+        self.assertEqual(self.guard.prepare(b'abc\ndef\nghi\n'), b'abc\ndef\n')
+        self.assertEqual(self.guard.prepare(b'a' * 20), b'a' * 10)
+        self.assertEqual(self.guard.prepare(b'abc\n'), b'abc\n')
+        self.assertEqual(
+            bytes(self.guard.prepare(memoryview(b'abc\ndef\nghi\n'))),
+            b'abc\ndef\n')
+
+    def test_binary_allowed(self):
+        from lib.blob_guard import BlobGuard
+        guard = BlobGuard(skip_binary=False)
+        self.assertEqual(guard.prepare(b'a\0b'), b'a\0b')
+
+
+class AnalyzerGuard(unittest.TestCase):
+
+    def setUp(self):
+        import os
+        import subprocess
+        import tempfile
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(self.path, commits=5, files=4, file_lines=20)
+        rnd = random.Random(0)
+        with open(os.path.join(self.path, 'data.py'), 'wb') as data_file:
+            data_file.write(bytes(rnd.randrange(256) for _ in range(100000)))
+        subprocess.run(['git', '-C', self.path, 'add', 'data.py'], check=True)
+        subprocess.run(
+            ['git', '-C', self.path, '-c', 'user.name=test',
+             '-c', 'user.email=test@example.com',
+             'commit', '-q', '-m', 'data'], check=True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_large_binary(self):
+        '''A large binary blob is skipped after reading its first bytes'''
+        import os
+        from lib.analyzer import Analyzer, Config
+        for workers in (1, 2):
+            files, _, summary = Analyzer(Config(
+                self.path, os.path.join(self.tmp_dir.name, 'report.csv'),
+                ['\\.txt$'], report_format='csv', workers=workers,
+                large_blob_size=10000)).run()
+            counters = summary["metrics"]["counters"]
+            self.assertEqual(counters["skipped_blobs"], 1)
+            self.assertLess(counters["bytes_read"], 100000)
+            self.assertEqual(files['data.py'].revisions[0].complexity.stats[
+                "cnt"], 0)
@@ -0,0 +1,89 @@
+'''
+Unit tests for lib/blob_reader.py
+'''
+
+import subprocess
+import tempfile
+import unittest
+
+
+class CatFileReader(unittest.TestCase):
+
+    def setUp(self):
+        from lib.blob_reader import CatFileReader
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        subprocess.run(
+            ['git', 'init', '-q', self.tmp_dir.name], check=True)
+        self.reader = CatFileReader(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.tmp_dir.cleanup()
+
+    def hash_object(self, data):
+        return subprocess.run(
+            ['git', '-C', self.tmp_dir.name, 'hash-object', '-w', '--stdin'],
+            input=data, stdout=subprocess.PIPE,
+            check=True).stdout.decode().strip()
+
+    def test_read(self):
+        '''Reads the content of a blob'''
+        hexsha = self.hash_object(b'abc\n')
+        self.assertEqual(self.reader.read(hexsha), b'abc\n')
+
+    def test_read_missing(self):
+        '''Raises KeyError for a missing object'''
+        with self.assertRaises(KeyError):
+            self.reader.read('0' * 40)
+
+    def test_read_many(self):
+        '''Reads more objects than fit into one chunk in order'''
+        contents = [str(i).encode() * (i % 7) for i in range(600)]
+        hexshas = [self.hash_object(data) for data in contents]
+        result = [
+            (hexsha, object_type, bytes(data))
+            for hexsha, object_type, data in self.reader.read_many(hexshas)]
+        expected_result = [
+            (hexsha, 'blob', data) for hexsha, data in zip(hexshas, contents)]
+        self.assertEqual(result, expected_result)
+
+    def test_big_object(self):
+        '''Reads an object bigger than the buffer'''
+        data = b'x' * 200000 + b'\n'
+        hexsha = self.hash_object(data)
+        self.assertEqual(self.reader.read(hexsha), data)
+        self.assertEqual(self.reader.read(self.hash_object(b'a')), b'a')
+
+    def test_read_prefix(self):
+        '''Reads the first bytes of a blob bigger than the threshold and
+        all of a smaller one
+        '''
+        from lib.blob_reader import read_blob_prefix
+        data = bytes(range(256)) * 1000
+        hexsha = self.hash_object(data)
+        self.assertEqual(
+            read_blob_prefix(self.tmp_dir.name, hexsha, 8000, 1000),
+            data[:8000])
+        self.assertEqual(read_blob_prefix(
+            self.tmp_dir.name, self.hash_object(b'a'), 8000, 1000), b'a')
+
+
+class ObjectSizeReader(unittest.TestCase):
+
+    def test_sizes(self):
+        '''Reads the sizes of the objects, None for a missing one'''
+        from lib.blob_reader import ObjectSizeReader
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            subprocess.run(['git', 'init', '-q', tmp_dir], check=True)
+            hexshas = [
+                subprocess.run(
+                    ['git', '-C', tmp_dir, 'hash-object', '-w', '--stdin'],
+                    input=data, stdout=subprocess.PIPE,
+                    check=True).stdout.decode().strip()
+                for data in (b'', b'abc\n')]
+            reader = ObjectSizeReader(tmp_dir)
+            try:
+                self.assertEqual(
+                    reader.sizes(hexshas + ['0' * 40]), [0, 4, None])
+            finally:
+                reader.close()
@@ -0,0 +1,129 @@
+'''
+Unit tests for lib/complexity.py
+'''
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RemovePythonDocstring(unittest.TestCase):
+
+    def setUp(self):
+        from lib.complexity import remove_python_docstring
+        self.remove_python_docstring = remove_python_docstring
+
+    def test_module_docstring(self):
+        '''Removes the shebang and the module docstring'''
+        lines = ["#!/usr/bin/python3", "'''", "Module", "'''", "import re"]
+        result = self.remove_python_docstring(lines)
+        self.assertEqual(result, ["import re"])
+
+    def test_function_docstring(self):
+        '''Removes the docstring of a function'''
+        lines = ["def f():", "    '''Doc'''", "    return 1"]
+        result = self.remove_python_docstring(lines)
+        self.assertEqual(result, ["def f():", "    return 1"])
+
+    def test_keeps_strings(self):
+        '''Keeps the multiline strings after the docstring'''
+        lines = ["'''Doc'''", "x = 1", "'''text'''"]
+        result = self.remove_python_docstring(lines)
+        self.assertEqual(result, lines[1:])
+
+    def test_function_without_docstring(self):
+        '''Keeps the function body when there is no docstring'''
+        lines = ["def f():", "    return 1"]
+        result = self.remove_python_docstring(lines)
+        self.assertEqual(result, lines)
+
+
+class AnalyzeComplexityData(unittest.TestCase):
+
+    def setUp(self):
+        from lib.complexity import analyze_complexity_data
+        self.analyze_complexity_data = analyze_complexity_data
+
+    def test_empty(self):
+        '''Returns empty statistics for an empty file'''
+        result = self.analyze_complexity_data(b'', None)
+        self.assertEqual(result["lines total"], 1)
+        self.assertEqual(result["lines code"], 0)
+        self.assertEqual(result["stats"]["hist"], [])
+
+    def test_indents(self):
+        '''Counts the lines per indentation level'''
+        data = b'a = 1\nif a:\n    b = 2\n    c = 3\n\n'
+        result = self.analyze_complexity_data(data, None)
+        self.assertEqual(result["lines total"], 6)
+        self.assertEqual(result["lines code"], 4)
+        self.assertEqual(result["stats"]["hist"], [2, 2])
+
+    def test_one_char_lines(self):
+        '''Ignores the lines with one character only when asked to'''
+        data = b'int f() {\n  return 1;\n}\n'
+        result = self.analyze_complexity_data(data, None, True)
+        self.assertEqual(result["lines code"], 2)
+        result = self.analyze_complexity_data(data, None, False)
+        self.assertEqual(result["lines code"], 3)
+
+    def test_python_docstring(self):
+        '''Removes the docstrings from python files only'''
+        data = b'"""Doc"""\nimport re\n'
+        self.assertEqual(
+            self.analyze_complexity_data(data, 'python')["lines code"], 1)
+        self.assertEqual(
+            self.analyze_complexity_data(data, None)["lines code"], 2)
+
+    def test_c_comments(self):
+        '''Removes the comments from C-family files'''
+        data = (b'/* License\n * text\n */\nint f() {\n'
+                b'    // comment\n    return g("/* x */"); // end\n}\n')
+        result = self.analyze_complexity_data(data, 'c')
+        self.assertEqual(result["lines total"], 8)
+        self.assertEqual(result["lines code"], 2)
+        self.assertEqual(result["stats"]["hist"], [1, 1])
+
+    def test_hash_comments(self):
+        '''Removes the comment lines from shell files'''
+        data = b'#!/bin/sh\n# comment\nif true; then\n  echo "#"\nfi\n'
+        result = self.analyze_complexity_data(data, 'shell')
+        self.assertEqual(result["lines code"], 3)
+
+    def test_invalid_utf8(self):
+        '''Ignores the bytes that are not valid utf-8'''
+        result = self.analyze_complexity_data(b'\xff\xfeab\n  cd\n', None)
+        self.assertEqual(result["stats"]["hist"], [1, 1])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class AnalyzeComplexityDataVectorized(AnalyzeComplexityData):
+
+    def setUp(self):
+        from lib.complexity import analyze_complexity_data_vectorized
+        self.analyze_complexity_data = analyze_complexity_data_vectorized
+
+    def test_same_as_analyze_complexity_data(self):
+        '''Returns the same results as analyze_complexity_data'''
+        from lib.complexity import analyze_complexity_data
+        pieces = [
+            b' ', b'\t', b'\n', b'\r', b'\x0b', b'x', b'yz', b'"""',
+            b"'''", b'def ', b'class ', b'#!', b'\xc3\xa9', b'\xff',
+            b'#', b'//', b'/*', b'*/', b'"', b"'", b'\\']
+        generator = random.Random(1)
+        for _ in range(2000):
+            data = b''.join(
+                generator.choice(pieces)
+                for _ in range(generator.randint(0, 40)))
+            for language in (None, 'python', 'c', 'shell'):
+                for ignore_one_char_lines in (False, True):
+                    self.assertEqual(
+                        self.analyze_complexity_data(
+                            data, language, ignore_one_char_lines),
+                        analyze_complexity_data(
+                            data, language, ignore_one_char_lines),
+                        data)
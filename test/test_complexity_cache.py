@@ -0,0 +1,58 @@
+'''
+Unit tests for lib/complexity_cache.py
+'''
+
+import unittest
+
+
+class SettingsFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        from lib.complexity_cache import settings_fingerprint
+        self.settings_fingerprint = settings_fingerprint
+
+    def test_same_settings(self):
+        '''Returns the same fingerprint for the same settings'''
+        a = self.settings_fingerprint(['a', 'b'], True)
+        b = self.settings_fingerprint(('a', 'b'), True)
+        self.assertEqual(a, b)
+
+    def test_different_patterns(self):
+        '''Returns different fingerprints for different ignore patterns'''
+        a = self.settings_fingerprint(['a', 'b'], True)
+        b = self.settings_fingerprint(['a'], True)
+        self.assertNotEqual(a, b)
+
+    def test_different_one_char_lines(self):
+        '''Returns different fingerprints for ignore_one_char_lines'''
+        a = self.settings_fingerprint(['a'], True)
+        b = self.settings_fingerprint(['a'], False)
+        self.assertNotEqual(a, b)
+
+
+class ComplexityCache(unittest.TestCase):
+
+    def setUp(self):
+        from lib.complexity_cache import ComplexityCache
+        self.cache = ComplexityCache(['a'], True)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return {"lines code": self.calls}
+
+    def test_computes_once(self):
+        '''Calls compute only once for the same key'''
+        key = self.cache.key('abc', None)
+        first = self.cache.lookup(key, self.compute)
+        second = self.cache.lookup(key, self.compute)
+        self.assertEqual(self.calls, 1)
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_language_in_key(self):
+        '''The same blob in another language is analyzed again'''
+        self.cache.lookup(self.cache.key('abc', None), self.compute)
+        self.cache.lookup(
+            self.cache.key('abc', 'python'), self.compute)
+        self.assertEqual(self.calls, 2)
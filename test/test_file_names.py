@@ -84,3 +84,75 @@ class ProcessRenamedFile(unittest.TestCase):
         result = self.process_renamed_file(file)
         expected_result = ('test/a/z', 'test/b/z')
         self.assertEqual(result, expected_result)
+
+
+class IgnoreMatcher(unittest.TestCase):
+
+    def setUp(self):
+        from lib.file_names import IgnoreMatcher
+        self.IgnoreMatcher = IgnoreMatcher
+
+    def test_same_as_ignore_file(self):
+        '''Returns the same as ignore_file'''
+        from lib.file_names import ignore_file
+        patterns = ['^vendor', r'\.md$', 'Makefile', '^test/']
+        matcher = self.IgnoreMatcher(patterns)
+        for file in ['vendor/a.c', 'src/vendor.c', 'README.md', 'a.md.c',
+                     'src/Makefile', 'test/a.py', 'tests/a.py', '', None]:
+            self.assertEqual(matcher(file), ignore_file(file, patterns))
+
+    def test_no_patterns(self):
+        '''Ignores nothing without patterns'''
+        matcher = self.IgnoreMatcher([])
+        self.assertIsNone(matcher('a'))
+        self.assertFalse(matcher.ignore_directory('a'))
+
+    def test_backreference(self):
+        '''Works with the patterns using backreferences'''
+        matcher = self.IgnoreMatcher(['x', r'(a)\1'])
+        self.assertTrue(matcher('baab'))
+        self.assertIsNone(matcher('bab'))
+
+    def test_ignore_directory(self):
+        '''Ignores the directories when all the files in them are ignored'''
+        matcher = self.IgnoreMatcher(['^vendor', '^e2e-test', 'build/'])
+        self.assertTrue(matcher.ignore_directory('vendor'))
+        self.assertTrue(matcher.ignore_directory('e2e-test'))
+        self.assertTrue(matcher.ignore_directory('src/build'))
+        self.assertFalse(matcher.ignore_directory('src'))
+        self.assertFalse(matcher.ignore_directory('src/vendor'))
+
+    def test_ignore_directory_end_anchor(self):
+        '''Does not ignore the directories for patterns matching the end'''
+        matcher = self.IgnoreMatcher(
+            [r'^docs$', r'\.md$', '^lib(?!/keep)', r'^src\b'])
+        self.assertFalse(matcher.ignore_directory('docs'))
+        self.assertFalse(matcher.ignore_directory('a.md'))
+        self.assertFalse(matcher.ignore_directory('lib'))
+        self.assertFalse(matcher.ignore_directory('src'))
+
+
+class PathMatcher(unittest.TestCase):
+
+    def test_paths(self):
+        '''Selects the listed files and the files in the listed
+        directories, the same way as git
+        '''
+        from lib.file_names import PathMatcher
+        matcher = PathMatcher(['src/dir1/', 'README.md'])
+        self.assertTrue(matcher('src/dir1/a.py'))
+        self.assertTrue(matcher('src/dir1/sub/b.py'))
+        self.assertTrue(matcher('README.md'))
+        self.assertFalse(matcher('src/dir10/a.py'))
+        self.assertFalse(matcher('src/a.py'))
+        self.assertTrue(matcher.visit_directory('src'))
+        self.assertTrue(matcher.visit_directory('src/dir1/sub'))
+        self.assertFalse(matcher.visit_directory('src/dir10'))
+        self.assertFalse(matcher.visit_directory('docs'))
+
+    def test_no_paths(self):
+        from lib.file_names import PathMatcher
+        for paths in ([], ['.']):
+            matcher = PathMatcher(paths)
+            self.assertTrue(matcher('src/a.py'))
+            self.assertTrue(matcher.visit_directory('src'))
@@ -0,0 +1,145 @@
+'''
+Unit tests for lib/git_log.py
+'''
+
+import io
+import os
+import subprocess
+import tempfile
+import unittest
+
+
+class SplitStream(unittest.TestCase):
+
+    def test_split(self):
+        '''Splits the fields across the chunk boundaries'''
+        from lib.git_log import split_stream
+        stream = io.BytesIO(b'abc\0de\0\0fghij\0k')
+        self.assertEqual(
+            list(split_stream(stream, chunk_size=3)),
+            [b'abc', b'de', b'', b'fghij', b'k'])
+
+
+class ParseLog(unittest.TestCase):
+
+    def setUp(self):
+        from lib.git_log import parse_log
+        self.parse_log = parse_log
+        self.sha = ['{:040x}'.format(i) for i in range(4)]
+        self.fields = [
+            '', self.sha[0] + ' 100', '',
+            '\n:000000 100644 ' + '0' * 40 + ' ' + self.sha[1] + ' A',
+            'a.py',
+            ':100644 000000 ' + self.sha[2] + ' ' + '0' * 40 + ' D', 'b.bin',
+            '3\t0\ta.py', '-\t-\tb.bin', '',
+            self.sha[3] + ' 200', '',
+            '\n:100644 100644 ' + self.sha[1] + ' ' + self.sha[2] + ' R090',
+            'a.py', 'c.py', '1\t2\t', 'a.py', 'c.py', '']
+
+    def test_commits(self):
+        '''Yields the commits with their timestamps'''
+        commits = list(self.parse_log(self.fields))
+        self.assertEqual(
+            [(commit.hexsha, commit.timestamp) for commit in commits],
+            [(self.sha[0], 100), (self.sha[3], 200)])
+
+    def test_changes(self):
+        '''Sets the paths of the added, deleted and renamed files'''
+        commits = list(self.parse_log(self.fields))
+        self.assertEqual(
+            [(change.status, change.old_path, change.new_path)
+             for commit in commits for change in commit.changes],
+            [('A', None, 'a.py'), ('D', 'b.bin', None),
+             ('R', 'a.py', 'c.py')])
+        self.assertEqual(commits[1].changes[0].new_hexsha, self.sha[2])
+
+    def test_numstat(self):
+        '''Adds the churn statistics, zero for binary files'''
+        commits = list(self.parse_log(self.fields))
+        self.assertEqual(
+            [(change.insertions, change.deletions)
+             for commit in commits for change in commit.changes],
+            [(3, 0), (0, 0), (1, 2)])
+
+
+class IterLog(unittest.TestCase):
+
+    def setUp(self):
+        from git import Repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        subprocess.run(
+            ['git', 'init', '-q', self.tmp_dir.name], check=True)
+        self.repo = Repo(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmp_dir.cleanup()
+
+    def commit(self, message, files):
+        for name, content in files.items():
+            file_name = os.path.join(self.tmp_dir.name, name)
+            if content is None:
+                os.remove(file_name)
+            else:
+                with open(file_name, 'w') as file:
+                    file.write(content)
+        subprocess.run(
+            ['git', '-C', self.tmp_dir.name, 'add', '-A'], check=True)
+        subprocess.run(
+            ['git', '-C', self.tmp_dir.name, '-c', 'user.name=test',
+             '-c', 'user.email=test@example.com', 'commit', '-q',
+             '-m', message], check=True)
+
+    def test_history(self):
+        '''Walks the history from the oldest commit and detects renames'''
+        from lib.git_log import iter_log
+        content = ''.join('line {}\n'.format(i) for i in range(20))
+        self.commit('add', {'a.py': content, 'b.py': 'b\n'})
+        self.commit('rename', {'a.py': None, 'c.py': content + 'x\n'})
+        self.commit('delete', {'b.py': None})
+        commits = list(iter_log(self.repo))
+        self.assertEqual(
+            [[(change.status, change.old_path, change.new_path,
+               change.insertions, change.deletions)
+              for change in commit.changes] for commit in commits],
+            [[('A', None, 'a.py', 20, 0), ('A', None, 'b.py', 1, 0)],
+             [('R', 'a.py', 'c.py', 1, 0)],
+             [('D', 'b.py', None, 0, 1)]])
+
+    def test_no_commits(self):
+        '''Yields nothing when no commit changes the paths'''
+        from lib.git_log import iter_log
+        self.commit('add', {'a.py': 'a\n'})
+        self.assertEqual(list(iter_log(self.repo, 'HEAD', ['missing'])), [])
+
+
+class IterLogMerges(unittest.TestCase):
+
+    def setUp(self):
+        from git import Repo
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        create_synthetic_repo(
+            self.tmp_dir.name, commits=60, files=20, file_lines=10,
+            merge_every=5)
+        self.repo = Repo(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmp_dir.cleanup()
+
+    def test_same_as_rev_list(self):
+        '''Walks the commits counted by git rev-list, also the merges
+        dropped by its history simplification are left out
+        '''
+        from lib.git_log import iter_log
+        for paths, options in [
+                ([], {}), (['src/dir1'], {}),
+                (['src/dir1'], {"first_parent": True}),
+                (['src'], {"until": '2100-01-01'})]:
+            hexshas = [commit.hexsha for commit in iter_log(
+                self.repo, 'HEAD', paths, **options)]
+            self.assertEqual(
+                hexshas, self.repo.git.rev_list(
+                    'HEAD', '--', *paths, reverse=True,
+                    **options).split())
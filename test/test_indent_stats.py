@@ -118,3 +118,61 @@ class JoinHistogram(unittest.TestCase):
         result = self.join_histogram(a, b)
         expected_result = [2, 4, 3]
         self.assertEqual(result, expected_result)
+
+
+class SubtractHistogram(unittest.TestCase):
+
+    def setUp(self):
+        from lib.indent_stats import subtract_histogram
+        self.subtract_histogram = subtract_histogram
+
+    def test_BothEmpty(self):
+        '''Returns empty on emtpy input'''
+        result = self.subtract_histogram([], [])
+        self.assertEqual(result, [])
+
+    def test_BEmpty(self):
+        '''Returns a when there is nothing to subtract'''
+        result = self.subtract_histogram([1, 2], [])
+        self.assertEqual(result, [1, 2])
+
+    def test_diff_len(self):
+        '''Subtracts a shorter histogram'''
+        result = self.subtract_histogram([3, 5, 3], [2, 3])
+        self.assertEqual(result, [1, 2, 3])
+
+    def test_trailing_zeroes(self):
+        '''Removes the levels nobody has anymore'''
+        result = self.subtract_histogram([3, 3, 1], [2, 2, 1])
+        self.assertEqual(result, [1, 1])
+
+    def test_reverts_join(self):
+        '''Subtracting the joined histogram returns the original one'''
+        from lib.indent_stats import join_histogram
+        a = [4, 1]
+        b = [1, 2, 3, 1]
+        result = self.subtract_histogram(join_histogram(a, b), b)
+        self.assertEqual(result, a)
+
+
+class ArrayHistograms(unittest.TestCase):
+
+    def test_process_indent_stats(self):
+        '''Processes a histogram kept in an array'''
+        from array import array
+        from lib.indent_stats import process_indent_stats
+        result = process_indent_stats(array('I', [1, 2, 3]))
+        expected_result = process_indent_stats([1, 2, 3])
+        self.assertEqual(result["avg"], expected_result["avg"])
+        self.assertEqual(result["stddev"], expected_result["stddev"])
+        self.assertEqual(result["max"], 3)
+
+    def test_join_and_subtract(self):
+        '''Joins and subtracts histograms kept in arrays'''
+        from array import array
+        from lib.indent_stats import join_histogram, subtract_histogram
+        a = array('I', [1, 2, 3])
+        b = array('I', [1, 2])
+        self.assertEqual(join_histogram([], a), [1, 2, 3])
+        self.assertEqual(join_histogram(a, b), [2, 4, 3])
+        self.assertEqual(subtract_histogram([2, 4, 3], a), [1, 2])
@@ -0,0 +1,72 @@
+'''
+Unit tests for lib/job_size.py
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class CountJob(unittest.TestCase):
+
+    def setUp(self):
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(
+            self.path, commits=20, files=8, file_lines=20,
+            rename_rate=0.2, delete_rate=0.1, merge_every=5)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def config(self, **settings):
+        from lib.config import Config
+        return Config(
+            self.path, os.path.join(self.tmp_dir.name, 'report.csv'),
+            ['\\.txt$'], report_format='csv', **settings)
+
+    def test_count(self):
+        '''Counts the same commits and files as the analysis'''
+        from lib.analyzer import Analyzer
+        from lib.job_size import count_job
+        job = count_job(self.config())
+        files, commits, summary = Analyzer(self.config()).run()
+        self.assertEqual(job["commits"], len(commits))
+        self.assertEqual(job["analyzed_commits"], len(commits))
+        self.assertEqual(job["files"], summary["files"])
+        self.assertGreater(job["size"], 0)
+
+    def test_sampling(self):
+        from lib.job_size import count_job
+        job = count_job(self.config(granularity='every_n', every_n=4))
+        self.assertEqual(job["commits"], 20)
+        self.assertLess(job["analyzed_commits"], 20)
+
+    def test_invalid_repository(self):
+        from lib.config import AnalysisError
+        from lib.job_size import count_job
+        self.path = os.path.join(self.tmp_dir.name, 'missing')
+        with self.assertRaises(AnalysisError):
+            count_job(self.config())
+
+    def test_lazy_imports(self):
+        '''The command line does not load git for --count'''
+        settings_file = os.path.join(self.tmp_dir.name, 'settings.yml')
+        with open(settings_file, 'w') as yml_file:
+            yml_file.write("path: repo\nreport: report.xlsx\n"
+                           "ignored_files: []\n")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, git_analysis\n'
+             'code = git_analysis.main(sys.argv[1:])\n'
+             'print("git" in sys.modules, "numpy" in sys.modules)\n'
+             'sys.exit(code)',
+             '--count', settings_file],
+            cwd=root, stdout=subprocess.PIPE, check=True)
+        lines = result.stdout.decode().splitlines()
+        self.assertIn(' 20 ', lines[1])
+        self.assertEqual(lines[-1], 'False False')
@@ -0,0 +1,84 @@
+'''
+Unit tests for lib/languages.py
+'''
+
+import unittest
+
+
+class LanguageForPath(unittest.TestCase):
+
+    def setUp(self):
+        from lib.languages import language_for_path
+        self.language_for_path = language_for_path
+
+    def test_extension(self):
+        '''Finds the language by the extension of the path'''
+        self.assertEqual(self.language_for_path('src/a.py'), 'python')
+        self.assertEqual(self.language_for_path('src/A.CPP'), 'c')
+        self.assertEqual(self.language_for_path('run.sh'), 'shell')
+        self.assertEqual(self.language_for_path('.ci/build.yml'), 'yaml')
+
+    def test_unknown(self):
+        '''Returns None for the files without a registered language'''
+        self.assertIsNone(self.language_for_path('README'))
+        self.assertIsNone(self.language_for_path('a.txt'))
+
+    def test_register(self):
+        '''Registers another language for new extensions'''
+        from lib.languages import LANGUAGES, register_language
+        register_language('test', ['.test'])
+        try:
+            self.assertEqual(self.language_for_path('a.test'), 'test')
+        finally:
+            del LANGUAGES['test']
+
+
+class RemoveCComments(unittest.TestCase):
+
+    def setUp(self):
+        from lib.languages import remove_c_comments
+        self.remove_c_comments = remove_c_comments
+
+    def test_keeps_lines(self):
+        '''Keeps the number of lines of the block comments'''
+        self.assertEqual(
+            self.remove_c_comments(b'a;/* x\ny\n*/b;\n'), b'a;\n\nb;\n')
+
+    def test_strings(self):
+        '''Leaves the comment markers in strings alone'''
+        data = b'url = "http://a/*"; c = \'"\'; // x\n'
+        self.assertEqual(
+            self.remove_c_comments(data),
+            b'url = "http://a/*"; c = \'"\'; \n')
+
+    def test_unterminated(self):
+        '''Removes an unterminated block comment up to the end'''
+        self.assertEqual(self.remove_c_comments(b'a;\n/* x\ny'), b'a;\n\n')
+
+
+class RemoveHashCommentLines(unittest.TestCase):
+
+    def test_comment_lines(self):
+        '''Removes only the lines with nothing but a comment'''
+        from lib.languages import remove_hash_comment_lines
+        self.assertEqual(
+            remove_hash_comment_lines(b'# a\n  # b\nc: 1  # d\n'),
+            b'\n\nc: 1  # d\n')
+
+
+class PythonFilters(unittest.TestCase):
+
+    def test_comments_and_docstrings(self):
+        '''Removes the comment lines, the shebang and the docstrings, the
+        same in the vectorized analysis
+        '''
+        from lib.complexity import (
+            analyze_complexity_data, analyze_complexity_data_vectorized)
+        data = (b'#!/usr/bin/python3\n"""Module"""\n# comment\nx = 1\n'
+                b'def f():\n    # indented comment\n    """Doc"""\n'
+                b'    return "#"  # trailing\n')
+        result = analyze_complexity_data(data, 'python')
+        self.assertEqual(result["lines code"], 3)
+        self.assertEqual(result["stats"]["hist"], [2, 1])
+        self.assertEqual(
+            analyze_complexity_data_vectorized(data, 'python'), result)
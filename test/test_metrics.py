@@ -0,0 +1,67 @@
+'''
+Unit tests for lib/metrics.py
+'''
+
+import json
+import os
+import tempfile
+import unittest
+
+
+class Metrics(unittest.TestCase):
+
+    def setUp(self):
+        from lib.metrics import Metrics
+        self.Metrics = Metrics
+
+    def test_stage(self):
+        '''Adds up the time of all the calls of a stage'''
+        metrics = self.Metrics()
+        metrics.add_time("read", 1.0)
+        with metrics.stage("read"):
+            pass
+        self.assertGreaterEqual(metrics.stages["read"], 1.0)
+        self.assertLess(metrics.stages["read"], 1.5)
+
+    def test_timed(self):
+        '''Yields all the items and measures the waiting for them'''
+        metrics = self.Metrics()
+        self.assertEqual(list(metrics.timed("walk", range(3))), [0, 1, 2])
+        self.assertIn("walk", metrics.stages)
+
+    def test_slowest_files(self):
+        '''Keeps the slowest files, the slowest one first'''
+        metrics = self.Metrics(slowest_files=2)
+        for i, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+            metrics.add_blob('f{}'.format(i), 10, 0.0, seconds)
+        summary = metrics.summary()
+        self.assertEqual(
+            [item["path"] for item in summary["slowest_files"]],
+            ['f2', 'f0'])
+        self.assertEqual(summary["counters"], {"blobs": 4, "bytes_read": 40})
+
+    def test_cache_hit_rate(self):
+        '''Calculates the cache hit rate, None without lookups'''
+        metrics = self.Metrics()
+        self.assertEqual(metrics.rates(3, 1)["cache_hit_rate"], 0.75)
+        self.assertIsNone(metrics.rates()["cache_hit_rate"])
+
+    def test_log(self):
+        '''Writes the progress and the summary as JSON lines'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, 'metrics.jsonl')
+            metrics = self.Metrics(log_file, interval=0)
+            metrics.progress(1)
+            metrics.close()
+            with open(log_file) as log:
+                events = [json.loads(line)["event"] for line in log]
+        self.assertEqual(events, ["progress", "summary"])
+
+
+class Profiler(unittest.TestCase):
+
+    def test_unknown_mode(self):
+        '''Raises ValueError for an unknown mode'''
+        from lib.metrics import Profiler
+        with self.assertRaises(ValueError):
+            Profiler('perf')
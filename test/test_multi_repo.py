@@ -0,0 +1,86 @@
+'''
+Unit tests for lib/multi_repo.py
+'''
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+
+class AnalyzeRepositories(unittest.TestCase):
+
+    def setUp(self):
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(self.path, commits=10, files=5, file_lines=20)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def config(self, path, report, **settings):
+        from lib.analyzer import Config
+        return Config(
+            path, os.path.join(self.tmp_dir.name, report), [],
+            report_format='csv', **settings)
+
+    def test_shared_cache(self):
+        '''The blobs of the second copy of a repository come from the cache
+        of the first one
+        '''
+        from lib.multi_repo import analyze_repositories
+        summaries = asyncio.run(analyze_repositories(
+            [self.config(self.path, 'first.csv'),
+             self.config(self.path, 'second.csv')], concurrency=1))
+        self.assertEqual(len(summaries), 2)
+        first, second = summaries
+        self.assertEqual(first["lines_code"], second["lines_code"])
+        self.assertGreater(first["metrics"]["counters"]["blobs"], 0)
+        self.assertNotIn("blobs", second["metrics"]["counters"])
+
+    def test_error(self):
+        '''A repository that cannot be analyzed does not stop the others'''
+        from lib.multi_repo import analyze_repositories, write_summary
+        summaries = asyncio.run(analyze_repositories(
+            [self.config(os.path.join(self.tmp_dir.name, 'missing'),
+                         'missing.csv'),
+             self.config(self.path, 'report.csv')]))
+        self.assertIn("error", summaries[0])
+        self.assertEqual(summaries[1]["commits"], 10)
+        summary_file = os.path.join(self.tmp_dir.name, 'summary.json')
+        write_summary(summary_file, summaries)
+        with open(summary_file) as input_file:
+            total = json.load(input_file)["total"]
+        self.assertEqual(total["repositories"], 2)
+        self.assertEqual(total["failed"], 1)
+        self.assertEqual(total["commits"], 10)
+
+    def test_shared_store(self):
+        '''The repositories with the same store are analyzed one after
+        another, the second one finds the commits of the first one there
+        '''
+        from lib.multi_repo import analyze_repositories
+        store = os.path.join(self.tmp_dir.name, 'store.sqlite')
+        summaries = asyncio.run(analyze_repositories(
+            [self.config(self.path, 'first.csv', store=store),
+             self.config(self.path, 'second.csv', store=store)],
+            concurrency=2))
+        first, second = summaries
+        self.assertNotIn("error", first)
+        self.assertNotIn("error", second)
+        self.assertEqual(first["lines_code"], second["lines_code"])
+        self.assertIn("tree_walk", first["metrics"]["stages"])
+        self.assertNotIn("tree_walk", second["metrics"]["stages"])
+
+    def test_store_error(self):
+        '''An error of the store is recorded in the summary of the
+        repository
+        '''
+        from lib.multi_repo import analyze_repositories
+        summaries = asyncio.run(analyze_repositories(
+            [self.config(self.path, 'first.csv', store=self.tmp_dir.name),
+             self.config(self.path, 'second.csv')]))
+        self.assertIn("error", summaries[0])
+        self.assertEqual(summaries[1]["commits"], 10)
@@ -0,0 +1,70 @@
+'''
+Unit tests for lib/records.py
+'''
+
+import unittest
+
+
+class CommitTable(unittest.TestCase):
+
+    def setUp(self):
+        from lib.records import CommitTable
+        self.table = CommitTable()
+
+    def test_add(self):
+        '''Returns the indexes of the commits in the order of adding'''
+        self.assertEqual(self.table.add('ab' * 20), 0)
+        self.assertEqual(self.table.add('cd' * 20), 1)
+        self.assertEqual(len(self.table), 2)
+
+    def test_hexsha(self):
+        '''Returns the commit id by the index'''
+        self.table.add('ab' * 20)
+        self.table.add('0123456789' * 4)
+        self.assertEqual(self.table.hexsha(1), '0123456789' * 4)
+        self.assertEqual(self.table.hexsha(0), 'ab' * 20)
+
+
+class BlobComplexity(unittest.TestCase):
+
+    def setUp(self):
+        from lib.records import BlobComplexity
+        self.BlobComplexity = BlobComplexity
+
+    def test_from_dict(self):
+        '''Takes the result of analyze_complexity_data'''
+        from lib.complexity import analyze_complexity_data
+        result = analyze_complexity_data(b'a = 1\nif a:\n    b = 2\n', False)
+        record = self.BlobComplexity.from_dict(result)
+        self.assertEqual(record.lines_total, 4)
+        self.assertEqual(record.lines_code, 3)
+        self.assertEqual(list(record.hist), [2, 1])
+        self.assertEqual(record.stats["avg"], result["stats"]["avg"])
+        self.assertEqual(record.stats["max"], result["stats"]["max"])
+
+    def test_no_dict(self):
+        '''Keeps no dictionary per record'''
+        record = self.BlobComplexity(1, 1, [1])
+        self.assertFalse(hasattr(record, '__dict__'))
+
+
+class FileStats(unittest.TestCase):
+
+    def setUp(self):
+        from lib.records import FileStats
+        self.FileStats = FileStats
+
+    def test_new(self):
+        '''Starts with empty statistics'''
+        file_stats = self.FileStats('a.py')
+        self.assertEqual(file_stats.name, 'a.py')
+        self.assertEqual(file_stats.commits, 0)
+        self.assertFalse(file_stats.deleted)
+        self.assertEqual(list(file_stats.revisions), [])
+
+    def test_max_revisions(self):
+        '''Keeps only the latest revisions added to the front'''
+        file_stats = self.FileStats('a.py', max_revisions=2)
+        for revision in range(4):
+            file_stats.revisions.appendleft(revision)
+        self.assertEqual(list(file_stats.revisions), [3, 2])
@@ -0,0 +1,123 @@
+'''
+Unit tests for lib/report_writers.py
+'''
+
+import csv
+import gzip
+import os
+import tempfile
+import unittest
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ReportWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from lib.records import (
+            BlobComplexity, CommitTable, FileRevision, FileStats)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.report_file = os.path.join(self.tmp_dir.name, 'report.xlsx')
+        self.commits = CommitTable()
+        self.commit_items = []
+        for i in range(5):
+            hexsha = '{:040x}'.format(i)
+            self.commits.add(hexsha)
+            self.commit_items.append({
+                "commit": hexsha, "date": "2017-03-1{}".format(i),
+                "stats": {"cnt": i, "avg": None if i == 0 else 1.5,
+                          "stddev": None, "max": i, "hist": [i]}})
+        self.files = {"b.py": FileStats("b.py"), "a.py": FileStats("a.py")}
+        self.files["a.py"].revisions = [
+            FileRevision(1, BlobComplexity(3, 2, [1, 1])),
+            FileRevision(0, BlobComplexity(2, 1, [1]))]
+        self.files["b.py"].deleted = True
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, report):
+        for item in self.commit_items:
+            report.add_commit(item)
+        report.write_files(self.files, self.commits)
+        report.close()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+
+class CsvReport(ReportWriterTestCase):
+
+    def read(self, name):
+        with gzip.open(self.path(name), 'rt', newline='') as csv_file:
+            return list(csv.reader(csv_file))
+
+    def test_commits(self):
+        '''Writes a row for every commit'''
+        from lib.report_writers import CsvReport, COMMIT_COLUMNS
+        self.write(CsvReport(self.report_file))
+        rows = self.read('report.commits.csv.gz')
+        self.assertEqual(rows[0], COMMIT_COLUMNS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[2], [
+            '{:040x}'.format(1), '2017-03-11', '1', '1.5', '', '1', '[1]'])
+
+    def test_files(self):
+        '''Writes a row for every revision of the files that are not
+        deleted
+        '''
+        from lib.report_writers import CsvReport
+        self.write(CsvReport(self.report_file))
+        rows = self.read('report.files.csv.gz')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][:8], [
+            'a.py', '0', '0', '0', '0', 'False', '0', '{:040x}'.format(1)])
+        self.assertEqual(rows[2][6:9], ['1', '{:040x}'.format(0), '1'])
+
+    def test_deleted_files(self):
+        '''Writes the deleted files when asked to'''
+        from lib.report_writers import CsvReport
+        self.write(CsvReport(self.report_file, show_deleted_files=True))
+        rows = self.read('report.files.csv.gz')
+        self.assertEqual(rows[3][:7], [
+            'b.py', '0', '0', '0', '0', 'True', ''])
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ArrowReport(ReportWriterTestCase):
+
+    def test_parquet_chunks(self):
+        '''Writes all the commits to parquet in several chunks'''
+        import pyarrow.parquet
+        from lib.report_writers import ArrowReport
+        report = ArrowReport(self.report_file)
+        report.chunk_size = 2
+        self.write(report)
+        parquet_file = pyarrow.parquet.ParquetFile(
+            self.path('report.commits.parquet'))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.column('cnt').to_pylist(), [0, 1, 2, 3, 4])
+        self.assertEqual(table.column('avg').to_pylist()[:2], [None, 1.5])
+
+    def test_arrow_files(self):
+        '''Writes the file revisions to an Arrow IPC file'''
+        import pyarrow.ipc
+        from lib.report_writers import ArrowReport
+        self.write(ArrowReport(self.report_file, report_format='arrow'))
+        table = pyarrow.ipc.open_file(
+            self.path('report.files.arrow')).read_all()
+        self.assertEqual(table.column('path').to_pylist(), ['a.py', 'a.py'])
+        self.assertEqual(table.column('hist').to_pylist(), [[1, 1], [1]])
+
+
+class CreateReport(unittest.TestCase):
+
+    def test_unknown_format(self):
+        '''Raises ValueError for an unknown format'''
+        from lib.report_writers import create_report
+        with self.assertRaises(ValueError):
+            create_report('doc', 'report.doc')
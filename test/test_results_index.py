@@ -0,0 +1,168 @@
+'''
+Unit tests for lib/results_index.py and lib/results_server.py
+'''
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+
+class ResultsIndex(unittest.TestCase):
+
+    def setUp(self):
+        from lib.results_index import ResultsIndex, ResultsQuery
+        from lib.tree_summary import TreeSummary
+        from lib.indent_stats import process_indent_stats
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp_dir.name, 'index.sqlite')
+        index = ResultsIndex(self.file_name)
+        lib = TreeSummary([4], 1, {"a.py": 'a'})
+        docs = TreeSummary([2], 1, {"b.py": 'b'})
+        first = TreeSummary([6], 2, {"lib": lib, "docs": docs})
+        changed = TreeSummary([8], 1, {"a.py": 'a'})
+        second = TreeSummary([8], 1, {"lib": changed})
+        index.add_commit(
+            0, 'a' * 40, '2020-01-01 00:00:00',
+            process_indent_stats(first.hist), first)
+        index.add_commit(
+            2, 'b' * 40, '2020-01-02 00:00:00',
+            process_indent_stats(second.hist), second)
+        index.close()
+        self.query = ResultsQuery(self.file_name)
+
+    def tearDown(self):
+        self.query.close()
+        self.tmp_dir.cleanup()
+
+    def test_commits(self):
+        self.assertEqual(
+            [row["hexsha"] for row in self.query.commits()],
+            ['a' * 40, 'b' * 40])
+        self.assertEqual(
+            [row["hist"] for row in self.query.commits(limit=1)], [[8]])
+
+    def test_directory_history(self):
+        '''Keeps a row for every commit changing the directory'''
+        self.assertEqual(
+            [(row["commit_hexsha"], row["files"], row["lines_code"])
+             for row in self.query.directory_history('lib/')],
+            [('a' * 40, 1, 4), ('b' * 40, 1, 8)])
+        self.assertEqual(
+            [row["lines_code"] for row in self.query.directory_history('')],
+            [6, 8])
+
+    def test_deleted_directory(self):
+        '''A deleted directory gets a row with no files'''
+        self.assertEqual(
+            [row["files"] for row in self.query.directory_history('docs')],
+            [1, 0])
+        self.assertEqual(
+            [row["path"] for row in self.query.directories()], ['', 'lib'])
+        self.assertEqual(
+            [row["path"] for row in self.query.directories(parent='')],
+            ['lib'])
+
+    def test_unknown_order(self):
+        with self.assertRaises(ValueError):
+            self.query.top_files(by='path')
+
+    def test_missing_index(self):
+        from lib.results_index import ResultsQuery
+        with self.assertRaises(ValueError):
+            ResultsQuery(os.path.join(self.tmp_dir.name, 'missing.sqlite'))
+
+
+class AnalyzerIndex(unittest.TestCase):
+
+    def setUp(self):
+        from lib.analyzer import Analyzer
+        from lib.synthetic_repo import create_synthetic_repo
+        from lib.results_index import ResultsQuery
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(
+            self.path, commits=20, files=8, file_lines=20,
+            rename_rate=0.2, delete_rate=0.1, merge_every=5)
+        self.index_file = os.path.join(self.tmp_dir.name, 'index.sqlite')
+        self.files, self.commits, self.summary = Analyzer(
+            self.config()).run()
+        self.query = ResultsQuery(self.index_file)
+
+    def tearDown(self):
+        self.query.close()
+        self.tmp_dir.cleanup()
+
+    def config(self, **settings):
+        from lib.analyzer import Config
+        return Config(
+            self.path, os.path.join(self.tmp_dir.name, 'report.csv'),
+            ['\\.txt$'], report_format='csv', results_index=self.index_file,
+            **settings)
+
+    def test_index(self):
+        '''Has the same results as the report'''
+        commits = self.query.commits()
+        self.assertEqual(len(commits), 20)
+        self.assertEqual(commits[-1]["lines_code"], self.summary["lines_code"])
+        self.assertEqual(
+            self.query.directory_history('')[-1]["lines_code"],
+            self.summary["lines_code"])
+        top_files = self.query.top_files(by='commits', limit=3)
+        self.assertEqual(
+            [row["commits"] for row in top_files],
+            sorted((file.commits for file in self.files.values()
+                    if not file.deleted), reverse=True)[:3])
+        name = top_files[0]["path"]
+        self.assertEqual(
+            [row["commit_hexsha"] for row in self.query.file_history(name)],
+            [self.commits.hexsha(revision.commit)
+             for revision in self.files[name].revisions])
+
+    def test_sampled_file_history(self):
+        '''The revisions of the files have their commits also when the
+        commits are not analyzed
+        '''
+        from lib.analyzer import Analyzer
+        from lib.results_index import ResultsQuery
+        self.query.close()
+        files, commits, _ = Analyzer(
+            self.config(granularity='every_n', every_n=7)).run()
+        self.query = ResultsQuery(self.index_file)
+        self.assertLess(len(self.query.commits()), len(commits))
+        for name, file_data in files.items():
+            rows = self.query.file_history(name)
+            self.assertEqual(
+                [row["commit_hexsha"] for row in rows],
+                [commits.hexsha(revision.commit)
+                 for revision in file_data.revisions])
+            self.assertTrue(all(row["date"] for row in rows))
+
+    def test_server(self):
+        '''Answers the queries with JSON'''
+        from lib.results_server import create_server
+        server = create_server(self.index_file, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = 'http://{}:{}'.format(*server.server_address[:2])
+        try:
+            with urlopen(url + '/files?by=lines&limit=2') as response:
+                self.assertEqual(
+                    json.load(response), self.query.top_files('lines', 2))
+            with urlopen(url + '/directory?path=') as response:
+                self.assertEqual(
+                    json.load(response), self.query.directory_history(''))
+            with self.assertRaises(HTTPError) as error:
+                urlopen(url + '/files?by=path')
+            self.assertEqual(error.exception.code, 400)
+            error.exception.close()
+            with self.assertRaises(HTTPError) as error:
+                urlopen(url + '/missing')
+            self.assertEqual(error.exception.code, 404)
+            error.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,47 @@
+'''
+Unit tests for lib/sampling.py
+'''
+
+import datetime
+import unittest
+
+
+def timestamp(*args):
+    return int(datetime.datetime(*args).timestamp())
+
+
+class SampleCommits(unittest.TestCase):
+
+    def setUp(self):
+        from lib.sampling import sample_commits
+        self.sample_commits = sample_commits
+        self.commits = [
+            ('e', timestamp(2017, 3, 21, 18)),
+            ('d', timestamp(2017, 3, 21, 9)),
+            ('c', timestamp(2017, 3, 20, 12)),
+            ('b', timestamp(2017, 3, 19, 12)),
+            ('a', timestamp(2017, 3, 19, 8))]
+
+    def test_all(self):
+        '''Returns None when all the commits are analyzed'''
+        self.assertIsNone(self.sample_commits(self.commits, 'all'))
+
+    def test_daily(self):
+        '''Selects the latest commit of every day'''
+        result = self.sample_commits(self.commits, 'daily')
+        self.assertEqual(result, {'e', 'c', 'b'})
+
+    def test_weekly(self):
+        '''Selects the latest commit of every week'''
+        result = self.sample_commits(self.commits, 'weekly')
+        self.assertEqual(result, {'e', 'b'})
+
+    def test_every_n(self):
+        '''Selects every n-th commit starting from the latest one'''
+        result = self.sample_commits(self.commits, 'every_n', 2)
+        self.assertEqual(result, {'e', 'c', 'a'})
+
+    def test_unknown(self):
+        '''Raises ValueError for an unknown granularity'''
+        with self.assertRaises(ValueError):
+            self.sample_commits(self.commits, 'hourly')
@@ -0,0 +1,52 @@
+'''
+Unit tests for lib/synthetic_repo.py
+'''
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+
+class SyntheticRepo(unittest.TestCase):
+
+    def setUp(self):
+        from lib.synthetic_repo import create_synthetic_repo
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'repo')
+        create_synthetic_repo(
+            self.path, commits=30, files=10, file_lines=20,
+            rename_rate=0.3, merge_every=10)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def git(self, *args):
+        return subprocess.run(
+            ['git', '-C', self.path] + list(args), stdout=subprocess.PIPE,
+            check=True).stdout.decode()
+
+    def test_commits(self):
+        '''Creates the requested number of commits with merges'''
+        self.assertEqual(self.git('rev-list', '--count', 'HEAD').strip(), '30')
+        self.assertEqual(
+            self.git('rev-list', '--merges', '--count', 'HEAD').strip(), '2')
+
+    def test_renames(self):
+        '''Renames some of the files'''
+        renames = self.git(
+            'log', '-M', '--diff-filter=R', '--format=', '--name-only')
+        self.assertTrue(renames.strip())
+
+    def test_same_seed(self):
+        '''Creates the same history for the same seed'''
+        from lib.synthetic_repo import create_synthetic_repo
+        path = os.path.join(self.tmp_dir.name, 'repo2')
+        create_synthetic_repo(
+            path, commits=30, files=10, file_lines=20,
+            rename_rate=0.3, merge_every=10)
+        self.assertEqual(
+            self.git('rev-parse', 'HEAD'),
+            subprocess.run(
+                ['git', '-C', path, 'rev-parse', 'HEAD'],
+                stdout=subprocess.PIPE, check=True).stdout.decode())
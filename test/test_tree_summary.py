@@ -0,0 +1,37 @@
+'''
+Unit tests for lib/tree_summary.py
+'''
+
+import unittest
+
+
+class TreeEntries(unittest.TestCase):
+
+    def test_entries(self):
+        from lib.tree_summary import tree_entries
+        data = (b'100644 a.py\0' + b'\1' * 20 +
+                b'40000 dir\0' + b'\2' * 20)
+        self.assertEqual(list(tree_entries(data)), [
+            (b'\1' * 20, 0o100644, 'a.py'), (b'\2' * 20, 0o40000, 'dir')])
+
+
+class TreeSummaryCache(unittest.TestCase):
+
+    def test_lru(self):
+        '''Drops the least recently used summary'''
+        from lib.tree_summary import TreeSummaryCache
+        cache = TreeSummaryCache(2)
+        cache.put(b'1', '', 'first')
+        cache.put(b'2', '', 'second')
+        self.assertEqual(cache.get(b'1', ''), 'first')
+        cache.put(b'3', '', 'third')
+        self.assertIsNone(cache.get(b'2', ''))
+        self.assertEqual(cache.get(b'1', ''), 'first')
+        self.assertEqual(cache.get(b'3', ''), 'third')
+
+    def test_path(self):
+        '''The same tree in another directory is another entry'''
+        from lib.tree_summary import TreeSummaryCache
+        cache = TreeSummaryCache()
+        cache.put(b'1', 'src', 'summary')
+        self.assertIsNone(cache.get(b'1', 'vendor'))
@@ -0,0 +1,75 @@
+'''
+Unit tests for lib/xlsx_report.py
+'''
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+
+class ComplexityValue(unittest.TestCase):
+
+    def setUp(self):
+        from lib.xlsx_report import complexity_value
+        self.complexity_value = complexity_value
+
+    def test_empty(self):
+        '''Returns zero for the statistics of an empty file'''
+        stats = {"max": 0, "stddev": None, "avg": None}
+        self.assertEqual(self.complexity_value(stats), 0.0)
+
+    def test_value(self):
+        '''Adds max, stddev * 10 and avg * 5'''
+        stats = {"max": 3, "stddev": 0.5, "avg": 2.0}
+        self.assertEqual(self.complexity_value(stats), 18.0)
+
+
+class XlsxReport(unittest.TestCase):
+
+    def setUp(self):
+        from lib.xlsx_report import XlsxReport
+        from lib.records import BlobComplexity, FileRevision, FileStats
+        self.XlsxReport = XlsxReport
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.xlsx_file = os.path.join(self.tmp_dir.name, 'report.xlsx')
+        stats = {"cnt": 3, "avg": 1.5, "stddev": 0.5, "max": 2}
+        self.commit = {"commit": "abc", "date": "2017-03-18", "stats": stats}
+        self.files = {"a.py": FileStats("a.py"), "b.py": FileStats("b.py")}
+        self.files["a.py"].commits = 2
+        self.files["a.py"].revisions.append(
+            FileRevision(0, BlobComplexity(4, 3, [1, 2])))
+        self.files["b.py"].commits = 1
+        self.files["b.py"].deleted = True
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_report(self, **kwargs):
+        report = self.XlsxReport(self.xlsx_file, **kwargs)
+        report.add_commit(self.commit)
+        report.add_commit(self.commit)
+        report.write_files(self.files)
+        report.close()
+        return zipfile.ZipFile(self.xlsx_file)
+
+    def test_writes_sheets(self):
+        '''Writes both sheets and the chart'''
+        names = self.write_report().namelist()
+        self.assertIn('xl/worksheets/sheet1.xml', names)
+        self.assertIn('xl/worksheets/sheet2.xml', names)
+        self.assertIn('xl/charts/chart1.xml', names)
+
+    def test_constant_memory(self):
+        '''Writes the same rows in the constant memory mode'''
+        sheet = self.write_report().read('xl/worksheets/sheet1.xml')
+        streamed_sheet = self.write_report(constant_memory=True).read(
+            'xl/worksheets/sheet1.xml')
+        self.assertEqual(sheet.count(b'<row '), 3)
+        self.assertEqual(streamed_sheet.count(b'<row '), 3)
+
+    def test_replaces_file(self):
+        '''Replaces an existing report'''
+        with open(self.xlsx_file, 'w') as old_file:
+            old_file.write('old')
+        self.assertIn('xl/workbook.xml', self.write_report().namelist())